@@ -0,0 +1,173 @@
+"""
+Analytics — vectorized equity / drawdown / win-loss computations.
+Works on daily aggregates so the frontend doesn't have to re-walk every entry.
+"""
+import numpy as np
+import pandas as pd
+
+
+def _curve_stats(dates, pnl):
+    """Equity curve, drawdown series and win/loss stats for one PnL view (gross or net)."""
+    equity = np.cumsum(pnl)
+    # Equity starts at 0, so the running peak never drops below 0
+    peak = np.maximum.accumulate(np.maximum(equity, 0.0)) if len(equity) else equity
+    drawdown = equity - peak
+
+    wins = pnl[pnl > 0]
+    losses = pnl[pnl < 0]
+    total_days = len(pnl)
+
+    stats = {
+        "total_pnl": float(pnl.sum()),
+        "winning_days": int(len(wins)),
+        "losing_days": int(len(losses)),
+        "total_days": int(total_days),
+        "win_rate": float(len(wins) / total_days * 100) if total_days else 0.0,
+        "avg_win": float(wins.mean()) if len(wins) else 0.0,
+        "avg_loss": float(losses.mean()) if len(losses) else 0.0,
+        "profit_factor": float(wins.sum() / abs(losses.sum())) if len(losses) else 0.0,
+        "max_drawdown": float(drawdown.min()) if total_days else 0.0,
+        "current_drawdown": float(drawdown[-1]) if total_days else 0.0,
+        "best_day": None,
+        "worst_day": None,
+        "last_ath_date": None,
+    }
+
+    if total_days:
+        best, worst = int(np.argmax(pnl)), int(np.argmin(pnl))
+        stats["best_day"] = {"date": dates[best], "pnl": float(pnl[best])}
+        stats["worst_day"] = {"date": dates[worst], "pnl": float(pnl[worst])}
+        at_high = np.flatnonzero(drawdown >= 0)
+        stats["last_ath_date"] = dates[at_high[-1]] if len(at_high) else None
+
+    return equity, drawdown, stats
+
+
+def compute_analytics(daily):
+    """
+    Build the analytics payload from daily aggregates.
+    `daily` is an iterable of (date, gross_pnl, brokerage, taxes, entry_count) rows sorted by date.
+    """
+    df = pd.DataFrame(
+        list(daily),
+        columns=["date", "gross_pnl", "brokerage", "taxes", "entry_count"],
+    )
+    df[["gross_pnl", "brokerage", "taxes"]] = df[["gross_pnl", "brokerage", "taxes"]].fillna(0.0).astype(float)
+    df["net_pnl"] = df["gross_pnl"] - df["brokerage"] - df["taxes"]
+
+    dates = [d.isoformat() for d in df["date"]]
+    gross = df["gross_pnl"].to_numpy()
+    net = df["net_pnl"].to_numpy()
+
+    gross_equity, gross_dd, gross_stats = _curve_stats(dates, gross)
+    net_equity, net_dd, net_stats = _curve_stats(dates, net)
+
+    total_brokerage = float(df["brokerage"].sum())
+    total_taxes = float(df["taxes"].sum())
+
+    return {
+        "total_brokerage": total_brokerage,
+        "total_taxes": total_taxes,
+        "total_charges": total_brokerage + total_taxes,
+        "total_entries": int(df["entry_count"].sum()),
+        "gross": gross_stats,
+        "net": net_stats,
+        # Columnar series — one array per field, aligned by index
+        "series": {
+            "date": dates,
+            "gross_pnl": gross.round(2).tolist(),
+            "net_pnl": net.round(2).tolist(),
+            "gross_equity": gross_equity.round(2).tolist(),
+            "net_equity": net_equity.round(2).tolist(),
+            "gross_drawdown": gross_dd.round(2).tolist(),
+            "net_drawdown": net_dd.round(2).tolist(),
+        },
+    }
+
+
+def _intensity(values, scale):
+    """-1..1 colour scale: value over the largest absolute value in its scale group."""
+    scale = scale.replace(0.0, np.nan)
+    return (values / scale).fillna(0.0).round(3) + 0.0  # + 0.0 turns -0.0 into 0.0
+
+
+def _bucket(df, key, pnl_col):
+    grouped = df.groupby(key, sort=True).agg(
+        start=("date", "min"),
+        gross_pnl=("gross_pnl", "sum"),
+        net_pnl=("net_pnl", "sum"),
+        entries=("entry_count", "sum"),
+        trading_days=("date", "count"),
+        win_days=("win", "sum"),
+        loss_days=("loss", "sum"),
+    )
+    pnl = grouped[pnl_col]
+    return {
+        key: grouped.index.tolist(),
+        "start": [d.isoformat() for d in grouped["start"]],
+        "gross_pnl": grouped["gross_pnl"].round(2).tolist(),
+        "net_pnl": grouped["net_pnl"].round(2).tolist(),
+        "win": (pnl > 0).tolist(),
+        "intensity": _intensity(pnl, pd.Series(pnl.abs().max(), index=pnl.index)).tolist(),
+        "entries": grouped["entries"].astype(int).tolist(),
+        "trading_days": grouped["trading_days"].astype(int).tolist(),
+        "win_days": grouped["win_days"].astype(int).tolist(),
+        "loss_days": grouped["loss_days"].astype(int).tolist(),
+    }
+
+
+def _win_summary(pnl):
+    wins, losses, total = int((pnl > 0).sum()), int((pnl < 0).sum()), int(len(pnl))
+    return {"wins": wins, "losses": losses, "total": total,
+            "win_rate": float(wins / total * 100) if total else 0.0}
+
+
+def compute_calendar(daily, basis="gross"):
+    """
+    Day, ISO-week and month buckets for the calendar heatmap, from the same daily rows
+    as compute_analytics. Win flags and intensity follow `basis` (gross or net PnL);
+    day intensity is scaled within its month, week / month intensity across the range.
+    """
+    df = pd.DataFrame(
+        list(daily),
+        columns=["date", "gross_pnl", "brokerage", "taxes", "entry_count"],
+    )
+    df[["gross_pnl", "brokerage", "taxes"]] = df[["gross_pnl", "brokerage", "taxes"]].fillna(0.0).astype(float)
+    df["entry_count"] = df["entry_count"].fillna(0)
+    df["net_pnl"] = df["gross_pnl"] - df["brokerage"] - df["taxes"]
+    pnl_col = f"{basis}_pnl"
+    df["win"] = df[pnl_col] > 0
+    df["loss"] = df[pnl_col] < 0
+
+    ts = pd.to_datetime(df["date"])
+    iso = ts.dt.isocalendar()
+    df["week"] = iso["year"].astype(str) + "-W" + iso["week"].astype(str).str.zfill(2)
+    df["month"] = ts.dt.strftime("%Y-%m")
+
+    pnl = df[pnl_col]
+    month_scale = pnl.abs().groupby(df["month"]).transform("max")
+
+    weeks = _bucket(df, "week", pnl_col)
+    months = _bucket(df, "month", pnl_col)
+
+    return {
+        "basis": basis,
+        "days": {
+            "date": [d.isoformat() for d in df["date"]],
+            "week": df["week"].tolist(),
+            "month": df["month"].tolist(),
+            "gross_pnl": df["gross_pnl"].round(2).tolist(),
+            "net_pnl": df["net_pnl"].round(2).tolist(),
+            "win": df["win"].tolist(),
+            "intensity": _intensity(pnl, month_scale).tolist(),
+            "entries": df["entry_count"].astype(int).tolist(),
+        },
+        "weeks": weeks,
+        "months": months,
+        # Win-rate cards: DAILY / WEEKLY / MONTHLY
+        "win_rate": {
+            "daily": _win_summary(pnl),
+            "weekly": _win_summary(pd.Series(weeks[pnl_col])),
+            "monthly": _win_summary(pd.Series(months[pnl_col])),
+        },
+    }
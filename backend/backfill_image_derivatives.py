@@ -0,0 +1,17 @@
+from dotenv import load_dotenv
+load_dotenv('config.env')
+
+from migrations import prepare_database
+import image_derivatives
+
+
+def run_backfill():
+    if image_derivatives.Image is None:
+        print("Pillow is not installed.")
+        return
+
+    prepare_database()
+    image_derivatives.backfill_derivatives()
+
+if __name__ == "__main__":
+    run_backfill()
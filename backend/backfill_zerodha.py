@@ -1,64 +1,14 @@
 import os
 import time
-import json
-import requests
-from datetime import datetime
 from playwright.sync_api import sync_playwright
 
-API_URL = "http://localhost:8000/journal"
-ACCOUNT_NAME = "KITE"
-
-def save_entry(date_str, gross_pnl, charges):
-    try:
-        try:
-             d = datetime.strptime(date_str, "%Y-%m-%d").strftime("%Y-%m-%d")
-        except:
-            d = date_str # usage as is
-
-        # Fetch Existing
-        try:
-            day_resp = requests.get(f"{API_URL}/entries", params={"start_date": d, "end_date": d})
-            day_data = day_resp.json() if day_resp.status_code == 200 else []
-        except:
-            day_data = []
-
-        current_accs = []
-        current_notes = ""
-        current_img = None
-        current_tw = []
+from dotenv import load_dotenv
+load_dotenv('config.env')
 
-        if day_data:
-            entry = day_data[0]
-            current_notes = entry.get('notes')
-            current_img = entry.get('image_path')
-            current_tw = entry.get('twitter_logs', [])
-            seen = set()
-            for e in day_data:
-                if e['account_name'] != ACCOUNT_NAME and e['account_name'] not in seen:
-                    current_accs.append({
-                        "account_name": e['account_name'],
-                        "pnl": e['pnl'], "brokerage": e['brokerage'], "taxes": e['taxes']
-                    })
-                    seen.add(e['account_name'])
+from importers.base import write_records
+from importers.zerodha_json import parse_rows
 
-        current_accs.append({
-            "account_name": ACCOUNT_NAME,
-            "pnl": gross_pnl,
-            "brokerage": charges,
-            "taxes": 0.0
-        })
-
-        payload = {
-            "date": d,
-            "notes": current_notes,
-            "image_path": current_img,
-            "accounts": current_accs,
-            "twitter_logs": current_tw
-        }
-
-        requests.post(f"{API_URL}/daily_log", json=payload)
-    except Exception as e:
-        print(f"Error saving {date_str}: {e}")
+ACCOUNT_NAME = "KITE"
 
 def process_data(data):
     result = data.get('data', {}).get('result', [])
@@ -68,20 +18,8 @@ def process_data(data):
         return
 
     print(f"Found {len(result)} records. Saving...")
-
-    count = 0
-    for row in result:
-        date_str = row.get('date')
-        if not date_str: continue
-        
-        pnl = float(row.get('pnl', 0))
-        realized = float(row.get('realized', pnl)) 
-        charges = float(row.get('charges', 0)) + float(row.get('other_charges', 0)) + float(row.get('taxes', 0))
-        
-        save_entry(date_str, realized, charges)
-        count += 1
-        
-    print(f"Successfully backfilled {count} entries.")
+    inserted, updated, skipped, _ = write_records(parse_rows(result, ACCOUNT_NAME))
+    print(f"Successfully backfilled {inserted + updated} entries ({skipped} unchanged).")
 
 
 def handle_response(response):
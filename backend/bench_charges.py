@@ -0,0 +1,37 @@
+"""
+Benchmark the vectorised charges engine over a synthetic fill history.
+
+Usage: python3 bench_charges.py [fills]
+"""
+import sys
+import time
+
+import numpy as np
+
+import charges
+
+
+def build_fills(n):
+    rng = np.random.default_rng(0)
+    days = np.datetime64("2021-01-01") + rng.integers(0, 5 * 365, n).astype("timedelta64[D]")
+    exchanges = rng.choice(["NFO", "BFO", "MCX"], n, p=[0.8, 0.15, 0.05])
+    symbols = rng.choice(["NIFTY24O1725000CE", "BANKNIFTY24O1751000PE", "NIFTY24OCTFUT"], n)
+    is_buy = rng.random(n) < 0.5
+    quantities = rng.integers(1, 20, n) * 25
+    prices = rng.uniform(5, 500, n)
+    return days, exchanges, symbols, is_buy, quantities, prices
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    fills = build_fills(n)
+
+    start = time.perf_counter()
+    brokerage, taxes = charges.total_charges(*fills)
+    elapsed = time.perf_counter() - start
+
+    print(f"{n} fills: {elapsed * 1000:.1f} ms  (brokerage {brokerage:,.2f}, taxes {taxes:,.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark /journal/entries: default row format vs ?format=columnar.
+Builds a synthetic 5-year, 4-account journal in a throwaway SQLite file.
+
+Usage: python3 bench_entries_format.py [repeats]
+(needs httpx for FastAPI's TestClient)
+"""
+import os
+import sys
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+# Point the app at a scratch database before anything imports `database`
+_tmp_dir = tempfile.mkdtemp(prefix="journal_bench_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'bench.db')}"
+os.chdir(_tmp_dir)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+from database import SessionLocal
+from db_models import JournalEntry, TwitterLog
+from main import app
+
+ACCOUNTS = ["KITE", "GROWW-ME", "GROWW-MOM", "GROWW-DAD"]
+YEARS = 5
+
+
+def build_dataset():
+    random.seed(7)
+    entries, logs = [], []
+    day = date.today() - timedelta(days=365 * YEARS)
+    while day <= date.today():
+        if day.weekday() < 5:
+            notes = "Synthetic notes for the day. " * 4 if random.random() < 0.3 else None
+            for acc in ACCOUNTS:
+                entries.append({
+                    "date": day, "account_name": acc,
+                    "pnl": round(random.gauss(2000, 40000), 2),
+                    "brokerage": round(random.uniform(40, 2500), 2),
+                    "taxes": round(random.uniform(20, 4000), 2),
+                    "notes": notes,
+                })
+            if random.random() < 0.2:
+                logs.append({"date": day, "twitter_handle": "@someone", "pnl": round(random.gauss(0, 50000), 2)})
+        day += timedelta(days=1)
+
+    db = SessionLocal()
+    db.bulk_insert_mappings(JournalEntry, entries)
+    db.bulk_insert_mappings(TwitterLog, logs)
+    db.commit()
+    db.close()
+    return len(entries)
+
+
+def time_request(client, params, repeats):
+    timings = []
+    size = 0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        resp = client.get("/journal/entries", params=params)
+        timings.append(time.perf_counter() - start)
+        size = len(resp.content)
+    timings.sort()
+    return timings[len(timings) // 2] * 1000, size
+
+
+def run_benchmark(repeats):
+    rows = build_dataset()
+    client = TestClient(app)
+    client.get("/journal/entries")  # warm up
+
+    print(f"Synthetic journal: {rows} entries ({YEARS} years x {len(ACCOUNTS)} accounts), median of {repeats} runs")
+    for label, params in [("rows (default)", {}), ("columnar", {"format": "columnar"})]:
+        ms, size = time_request(client, params, repeats)
+        print(f"  {label:<16} {ms:8.1f} ms  {size / 1024:8.1f} KiB")
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -0,0 +1,185 @@
+"""
+Benchmark SQLite under concurrent load: readers alone, then small daily_log-style writes
+alongside them as with gunicorn workers, then the same with a bulk import running. Compares
+SQLITE_PROFILE=legacy (pysqlite defaults) with the production profile (WAL, pragmas,
+BEGIN IMMEDIATE writers, busy timeout) on a scratch database.
+
+Usage: python3 bench_sqlite_concurrency.py [seconds] [readers]
+"""
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ACCOUNTS = ["KITE", "GROWW-ME", "GROWW-MOM", "GROWW-DAD"]
+HISTORY_DAYS = 5 * 250
+IMPORT_BATCH = 500
+
+
+def _records(days, seed):
+    rng = random.Random(seed)
+    start = date(2020, 1, 1)
+    return [
+        {"date": start + timedelta(days=i), "account_name": acc,
+         "pnl": rng.uniform(-20000, 25000), "brokerage": rng.uniform(0, 400), "taxes": rng.uniform(0, 900)}
+        for i in range(days) for acc in ACCOUNTS
+    ]
+
+
+def _setup(_seconds):
+    import db_models
+    from database import engine, WriteSessionLocal
+    from journal_service import upsert_account_days
+
+    db_models.Base.metadata.create_all(bind=engine)
+    db = WriteSessionLocal()
+    upsert_account_days(db, _records(HISTORY_DAYS, 0))
+    db.commit()
+    db.close()
+    return {"ops": 1, "locked_errors": 0, "max_ms": 0}
+
+
+def _run_for(seconds, step):
+    latencies = []
+    errors = 0
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        t0 = time.perf_counter()
+        try:
+            step()
+            latencies.append(time.perf_counter() - t0)
+        except Exception as e:
+            if "locked" not in str(e) and "busy" not in str(e).lower():
+                raise
+            errors += 1
+    return {"ops": len(latencies), "locked_errors": errors, "max_ms": max(latencies, default=0) * 1000}
+
+
+def _import(seconds):
+    """Re-import the whole history in batches, over and over (importers/base.py path)."""
+    from database import WriteSessionLocal
+    from journal_service import upsert_account_days
+
+    records = _records(HISTORY_DAYS, 1)
+    state = {"i": 0}
+
+    def step():
+        db = WriteSessionLocal()
+        try:
+            i = state["i"] % len(records)
+            upsert_account_days(db, records[i:i + IMPORT_BATCH])
+            db.commit()
+            state["i"] += IMPORT_BATCH
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    return _run_for(seconds, step)
+
+
+def _write(seconds):
+    """Single-day read-modify-write, like POST /daily_log."""
+    from database import WriteSessionLocal
+    from db_models import JournalEntry
+    from journal_service import refresh_daily_summary, bump_journal_version
+
+    rng = random.Random(os.getpid())
+
+    def step():
+        db = WriteSessionLocal()
+        try:
+            day = date(2020, 1, 1) + timedelta(days=rng.randrange(HISTORY_DAYS))
+            rows = db.query(JournalEntry).filter(JournalEntry.date == day).all()
+            for row in rows:
+                row.pnl = (row.pnl or 0.0) + 1
+            refresh_daily_summary(db, [day])
+            bump_journal_version(db)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    return _run_for(seconds, step)
+
+
+def _read(seconds):
+    """A year of entries plus the analytics rollup, like GET /entries + /analytics."""
+    from sqlalchemy import func
+    from database import SessionLocal
+    from db_models import JournalEntry, DailySummary
+
+    rng = random.Random(os.getpid())
+
+    def step():
+        db = SessionLocal()
+        try:
+            start = date(2020, 1, 1) + timedelta(days=rng.randrange(HISTORY_DAYS - 365))
+            db.query(JournalEntry).filter(
+                JournalEntry.date >= start, JournalEntry.date < start + timedelta(days=365)
+            ).all()
+            db.query(func.sum(DailySummary.gross_pnl)).filter(DailySummary.account_name == "ALL").scalar()
+        finally:
+            db.close()
+    return _run_for(seconds, step)
+
+
+ROLES = {"setup": _setup, "import": _import, "write": _write, "read": _read}
+
+
+def _spawn(role, profile, db_path, seconds):
+    env = dict(os.environ, SQLITE_PROFILE=profile, DATABASE_URL=f"sqlite:///{db_path}")
+    return subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--role", role, str(seconds)],
+        env=env, stdout=subprocess.PIPE, text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+
+
+def _bench(profile, seconds, readers, writers, importer):
+    with tempfile.TemporaryDirectory(prefix="journal_sqlite_bench_") as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        if _spawn("setup", profile, db_path, 0).wait():
+            raise SystemExit("setup failed")
+
+        roles = ["import"] * importer + ["write"] * writers + ["read"] * readers
+        procs = [(role, _spawn(role, profile, db_path, seconds)) for role in roles]
+        totals = {role: {"ops": 0, "locked_errors": 0, "max_ms": 0} for role in ROLES if role != "setup"}
+        for role, proc in procs:
+            out, _ = proc.communicate()
+            result = json.loads(out.strip().splitlines()[-1])
+            t = totals[role]
+            t["ops"] += result["ops"]
+            t["locked_errors"] += result["locked_errors"]
+            t["max_ms"] = max(t["max_ms"], result["max_ms"])
+        return totals
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    readers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    print(f"{seconds:.0f}s per run, {readers} readers (+ 2 day writers, + 1 bulk importer), "
+          f"{HISTORY_DAYS} days x {len(ACCOUNTS)} accounts\n")
+    print(f"{'scenario':<12}{'profile':<12}{'reads/s':>9}{'slowest read':>14}{'writes/s':>10}"
+          f"{'slowest write':>15}{'import batches/s':>18}{'rows written/s':>16}  locked errors (read/write/import)")
+    for scenario, writers, importer in (("reads", 0, 0), ("api", 2, 0), ("api+import", 2, 1)):
+        for profile in ("legacy", "production"):
+            t = _bench(profile, seconds, readers, writers, importer)
+            rows = t["write"]["ops"] * len(ACCOUNTS) + t["import"]["ops"] * IMPORT_BATCH
+            errors = "/".join(str(t[role]["locked_errors"]) for role in ("read", "write", "import"))
+            print(f"{scenario:<12}{profile:<12}{t['read']['ops'] / seconds:>9.1f}{t['read']['max_ms']:>12.0f}ms"
+                  f"{t['write']['ops'] / seconds:>10.1f}{t['write']['max_ms']:>13.0f}ms"
+                  f"{t['import']['ops'] / seconds:>18.1f}{rows / seconds:>16.0f}  {errors}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--role":
+        print(json.dumps(ROLES[sys.argv[2]](float(sys.argv[3]))))
+    else:
+        main()
@@ -4,16 +4,21 @@ Adapted from capture_pnl.py for server-side use (no Selenium/browser).
 """
 import os
 import time
+import threading
 import urllib.parse
 import requests
 import pandas as pd
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FuturesTimeout, wait
 from datetime import datetime
+from functools import partial
 
 # Zerodha
 try:
     from kiteconnect import KiteConnect
+    from kiteconnect.exceptions import TokenException
 except ImportError:
     KiteConnect = None
+    TokenException = None
 
 try:
     import pyotp
@@ -23,9 +28,20 @@ except ImportError:
 # Groww
 try:
     from growwapi import GrowwAPI
+    from growwapi.groww.exceptions import GrowwAPIAuthenticationException, GrowwAPIAuthorisationException
+    GROWW_AUTH_ERRORS = (GrowwAPIAuthenticationException, GrowwAPIAuthorisationException)
 except ImportError:
     GrowwAPI = None
+    GROWW_AUTH_ERRORS = ()
 
+import charges
+import token_cache
+import trades
+
+
+# Timeout (seconds) for every broker HTTP call we make directly: the TOTP login flow and
+# all growwapi calls (which default to no timeout). KiteConnect uses its own 7s default.
+HTTP_TIMEOUT = 10
 
 # ─── Zerodha ────────────────────────────────────────────────────────
 
@@ -45,7 +61,8 @@ def _zerodha_totp_login(api_key):
         # Step 1: POST login credentials
         login_resp = session.post(
             "https://kite.zerodha.com/api/login",
-            data={"user_id": user_id, "password": password}
+            data={"user_id": user_id, "password": password},
+            timeout=HTTP_TIMEOUT
         )
         login_data = login_resp.json()
         if login_data.get('status') != 'success':
@@ -62,7 +79,8 @@ def _zerodha_totp_login(api_key):
                 "request_id": request_id,
                 "twofa_value": totp_value,
                 "twofa_type": "totp"
-            }
+            },
+            timeout=HTTP_TIMEOUT
         )
         if twofa_resp.json().get('status') != 'success':
             return None
@@ -70,7 +88,8 @@ def _zerodha_totp_login(api_key):
         # Step 3: Get redirect with request_token
         redirect_resp = session.get(
             f"https://kite.trade/connect/login?api_key={api_key}&v=3",
-            allow_redirects=False
+            allow_redirects=False,
+            timeout=HTTP_TIMEOUT
         )
         redirect_location = redirect_resp.headers.get('Location', '')
         if 'request_token=' in redirect_location:
@@ -83,44 +102,65 @@ def _zerodha_totp_login(api_key):
         return None
 
 
-def init_zerodha():
-    """Initialize Zerodha Kite client. Returns KiteConnect instance or None."""
-    if KiteConnect is None:
-        return None
-
-    api_key = os.getenv('ZERODHA_API_KEY')
-    api_secret = os.getenv('ZERODHA_API_SECRET')
-    if not api_key or not api_secret:
-        return None
+ZERODHA_TOKEN_KEY = 'zerodha'
+ZERODHA_TOKEN_PATH = os.path.join(os.path.dirname(__file__), 'access_token.txt')
 
-    kite = KiteConnect(api_key=api_key)
 
-    # Try saved access token
-    token_path = os.path.join(os.path.dirname(__file__), 'access_token.txt')
-    if os.path.exists(token_path):
+def _zerodha_new_token(kite, api_key, api_secret):
+    """
+    Obtain a Zerodha access token: reuse access_token.txt if it's from the current
+    session window, otherwise do a TOTP login. Returns (token, expires_at) or (None, None).
+    """
+    # Saved access token (written by this service or a manual login)
+    if os.path.exists(ZERODHA_TOKEN_PATH):
         try:
-            with open(token_path, 'r') as f:
+            with open(ZERODHA_TOKEN_PATH, 'r') as f:
                 access_token = f.read().strip()
-            kite.set_access_token(access_token)
-            kite.profile()  # Validate
-            return kite
+            expires_at = token_cache.next_token_expiry(os.path.getmtime(ZERODHA_TOKEN_PATH))
+            if access_token and expires_at > time.time():
+                kite.set_access_token(access_token)
+                kite.profile()  # Validate once; cached afterwards until expiry
+                return access_token, expires_at
         except Exception:
             pass
 
     # Try TOTP login
     request_token = _zerodha_totp_login(api_key)
     if not request_token:
-        return None
+        return None, None
 
     try:
         data = kite.generate_session(request_token, api_secret=api_secret)
-        kite.set_access_token(data["access_token"])
-        with open(token_path, 'w') as f:
+        with open(ZERODHA_TOKEN_PATH, 'w') as f:
             f.write(data["access_token"])
-        return kite
+        return data["access_token"], token_cache.next_token_expiry()
     except Exception:
+        return None, None
+
+
+def init_zerodha():
+    """Initialize Zerodha Kite client. Returns KiteConnect instance or None."""
+    if KiteConnect is None:
         return None
 
+    api_key = os.getenv('ZERODHA_API_KEY')
+    api_secret = os.getenv('ZERODHA_API_SECRET')
+    if not api_key or not api_secret:
+        return None
+
+    kite = KiteConnect(api_key=api_key)
+
+    # Shared across workers — no profile() round trip while the token is known to be fresh
+    access_token = token_cache.get_or_refresh(
+        ZERODHA_TOKEN_KEY,
+        lambda: _zerodha_new_token(kite, api_key, api_secret)
+    )
+    if not access_token:
+        return None
+
+    kite.set_access_token(access_token)
+    return kite
+
 
 def calculate_zerodha_charges(kite):
     """Estimate Zerodha F&O charges from today's executed orders."""
@@ -132,34 +172,16 @@ def calculate_zerodha_charges(kite):
             and o['exchange'] in ['NFO', 'MCX', 'CDS', 'BFO']
             and o['order_timestamp'].date() == pd.Timestamp.now().date()
         ]
+        trades.record_kite_fills('KITE', executed_orders)
 
-        num_orders = len(executed_orders)
-        brokerage = num_orders * 20.0
-
-        turnover = 0.0
-        premium_turnover = 0.0
-        stamp_duty_turnover = 0.0
-
-        for o in executed_orders:
-            val = o['filled_quantity'] * o['average_price']
-            turnover += val
-            is_option = 'CE' in o['tradingsymbol'] or 'PE' in o['tradingsymbol']
-            is_sell = o['transaction_type'] == 'SELL'
-            is_buy = o['transaction_type'] == 'BUY'
-
-            if is_option and is_sell:
-                premium_turnover += val
-            if is_buy:
-                stamp_duty_turnover += val
-
-        stt = premium_turnover * 0.000625
-        exchange_txn = turnover * 0.00053
-        sebi_charges = turnover * 0.000001
-        stamp_duty = stamp_duty_turnover * 0.00003
-        gst = (brokerage + exchange_txn + sebi_charges) * 0.18
-
-        total_charges = brokerage + stt + exchange_txn + sebi_charges + stamp_duty + gst
-        return brokerage, total_charges - brokerage  # brokerage, taxes
+        return charges.total_charges(
+            [o['order_timestamp'].date() for o in executed_orders],
+            [o['exchange'] for o in executed_orders],
+            [o['tradingsymbol'] for o in executed_orders],
+            [o['transaction_type'] == 'BUY' for o in executed_orders],
+            [o['filled_quantity'] for o in executed_orders],
+            [o['average_price'] for o in executed_orders],
+        )  # brokerage, taxes
 
     except Exception:
         return 0.0, 0.0
@@ -190,58 +212,117 @@ def fetch_zerodha_pnl():
         }, None
 
     except Exception as e:
+        if TokenException is not None and isinstance(e, TokenException):
+            # Revoked early (e.g. logged in elsewhere) — force a re-login next time
+            token_cache.invalidate(ZERODHA_TOKEN_KEY, kite.access_token)
         return None, f"Zerodha fetch error: {str(e)}"
 
 
 # ─── Groww ──────────────────────────────────────────────────────────
 
 def calculate_groww_charges(positions):
-    """Estimate Groww F&O charges from position-level data."""
+    """Estimate Groww F&O charges from position-level data (each side with quantity counts as one order)."""
     try:
-        num_orders = 0
-        buy_turnover = 0.0
-        sell_turnover = 0.0
-        option_sell_premium = 0.0
-        future_sell_turnover = 0.0
-
+        today = datetime.now().date()
+        fills = []
         for pos in positions:
-            trading_symbol = pos.get('trading_symbol', '')
-            is_option = trading_symbol.endswith('CE') or trading_symbol.endswith('PE')
-
-            credit_qty = pos.get('credit_quantity', 0)
-            credit_price = pos.get('credit_price', 0.0)
-            debit_qty = pos.get('debit_quantity', 0)
-            debit_price = pos.get('debit_price', 0.0)
-
-            if credit_qty > 0:
-                num_orders += 1
-            if debit_qty > 0:
-                num_orders += 1
-
-            buy_val = credit_qty * credit_price
-            sell_val = debit_qty * debit_price
-            buy_turnover += buy_val
-            sell_turnover += sell_val
-
-            if is_option:
-                option_sell_premium += sell_val
-            else:
-                future_sell_turnover += sell_val
+            exchange = pos.get('exchange', 'NSE')
+            symbol = pos.get('trading_symbol', '')
+            fills.append((exchange, symbol, True, pos.get('credit_quantity', 0), pos.get('credit_price', 0.0)))
+            fills.append((exchange, symbol, False, pos.get('debit_quantity', 0), pos.get('debit_price', 0.0)))
+
+        exchanges, symbols, is_buy, quantities, prices = zip(*fills) if fills else ([],) * 5
+        return charges.total_charges(
+            [today] * len(fills),
+            # Groww reports the cash exchange (NSE/BSE) on F&O positions
+            [{'NSE': 'NFO', 'BSE': 'BFO'}.get(e, e) for e in exchanges],
+            symbols, is_buy, quantities, prices,
+        )  # brokerage, taxes
+
+    except Exception:
+        return 0.0, 0.0
 
-        total_turnover = buy_turnover + sell_turnover
 
-        brokerage = num_orders * 20.0
-        stt = (option_sell_premium * 0.000625) + (future_sell_turnover * 0.000125)
-        exchange_txn = total_turnover * 0.00053
-        sebi_charges = total_turnover * 0.000001
-        stamp_duty = buy_turnover * 0.00003
-        gst = (brokerage + exchange_txn + sebi_charges) * 0.18
+# LTPs are shared across accounts: a leg held in several family accounts is quoted once
+GROWW_LTP_BATCH_SIZE = 50  # max instruments per get_ltp call
+QUOTE_CACHE_TTL = float(os.getenv('QUOTE_CACHE_TTL', '2'))
+_quote_cache = {}  # (exchange, trading_symbol) -> (ltp, fetched_at)
+_quote_inflight = {}  # (exchange, trading_symbol) -> Future of the caller currently fetching it
+# Guards the two dicts above; never held across a network call
+_quote_lock = threading.Lock()
 
-        total_charges = brokerage + stt + exchange_txn + sebi_charges + stamp_duty + gst
-        return brokerage, total_charges - brokerage  # brokerage, taxes
 
+def _groww_quote_ltp(client, exchange, trading_symbol):
+    """Single-instrument fallback when a batched LTP call fails."""
+    try:
+        quote = client.get_quote(trading_symbol, exchange, client.SEGMENT_FNO, timeout=HTTP_TIMEOUT)
+        if isinstance(quote, dict):
+            return quote.get('last_price', 0.0)
     except Exception:
-        return 0.0, 0.0
+        pass
+    return 0.0
+
+
+def _groww_fetch_ltps(client, legs):
+    """Batched get_ltp calls for `legs`, falling back to one quote per leg the batch didn't price."""
+    ltps = {}
+    for i in range(0, len(legs), GROWW_LTP_BATCH_SIZE):
+        batch = legs[i:i + GROWW_LTP_BATCH_SIZE]
+        keys = {f"{exchange}_{symbol}": (exchange, symbol) for exchange, symbol in batch}
+        try:
+            response = client.get_ltp(tuple(keys), client.SEGMENT_FNO, timeout=HTTP_TIMEOUT)
+            prices = {keys[k]: float(v) for k, v in response.items() if k in keys} if isinstance(response, dict) else {}
+        except Exception:
+            prices = {}
+        for leg in batch:
+            ltp = prices.get(leg)
+            ltps[leg] = ltp if ltp is not None else _groww_quote_ltp(client, *leg)
+    return ltps
+
+
+def _groww_ltps(client, legs):
+    """
+    LTP for each (exchange, trading_symbol) in `legs`, using batched get_ltp calls
+    and a short-TTL cache shared by all accounts. A leg another account is already
+    fetching is waited for instead of fetched again; legs that don't overlap are
+    fetched in parallel. Missing prices come back as 0.0.
+    """
+    ltps = {}
+    mine = []
+    theirs = {}
+    now = time.time()
+    with _quote_lock:
+        for leg in legs:
+            entry = _quote_cache.get(leg)
+            if entry and now - entry[1] < QUOTE_CACHE_TTL:
+                ltps[leg] = entry[0]
+            elif leg in _quote_inflight:
+                theirs[leg] = _quote_inflight[leg]
+            else:
+                _quote_inflight[leg] = Future()
+                mine.append(leg)
+
+    fetched = {}
+    try:
+        if mine:
+            fetched = _groww_fetch_ltps(client, mine)
+    finally:
+        fetched_at = time.time()
+        with _quote_lock:
+            for leg in mine:
+                ltp = fetched.get(leg, 0.0)
+                if ltp:
+                    _quote_cache[leg] = (ltp, fetched_at)
+                _quote_inflight.pop(leg).set_result(ltp)
+    ltps.update(fetched)
+
+    for leg, future in theirs.items():
+        try:
+            # The other fetch is bounded by its own HTTP timeouts; don't wait on it longer than one call
+            ltps[leg] = future.result(timeout=HTTP_TIMEOUT)
+        except FuturesTimeout:
+            ltps[leg] = _groww_quote_ltp(client, *leg)
+    return ltps
 
 
 def fetch_groww_pnl(account_name, api_key_env, api_secret_env):
@@ -254,17 +335,23 @@ def fetch_groww_pnl(account_name, api_key_env, api_secret_env):
     if not api_key or not api_secret:
         return None, f"{account_name}: credentials not configured"
 
+    token_key = f"groww:{account_name}"
+    access_token = None
     try:
-        access_token = GrowwAPI.get_access_token(api_key=api_key, secret=api_secret)
-        client = GrowwAPI(access_token)
-
-        # Verify connection
-        profile = client.get_user_profile()
-        if not profile:
+        def refresh():
+            token = GrowwAPI.get_access_token(api_key=api_key, secret=api_secret)
+            # Verify the new token once; cached tokens skip this round trip
+            if not GrowwAPI(token).get_user_profile(timeout=HTTP_TIMEOUT):
+                return None, None
+            return token, token_cache.next_token_expiry()
+
+        access_token = token_cache.get_or_refresh(token_key, refresh)
+        if not access_token:
             return None, f"{account_name}: could not authenticate"
+        client = GrowwAPI(access_token)
 
         # Fetch FNO positions
-        response = client.get_positions_for_user(segment=client.SEGMENT_FNO)
+        response = client.get_positions_for_user(segment=client.SEGMENT_FNO, timeout=HTTP_TIMEOUT)
 
         if isinstance(response, dict):
             positions = response.get('positions', response.get('userPositions', []))
@@ -273,6 +360,13 @@ def fetch_groww_pnl(account_name, api_key_env, api_secret_env):
         else:
             positions = []
 
+        # Price every open leg up front in batched LTP calls
+        open_legs = {
+            (pos.get('exchange', 'NSE'), pos.get('trading_symbol', ''))
+            for pos in positions if pos.get('quantity', 0) != 0
+        }
+        ltps = _groww_ltps(client, open_legs) if open_legs else {}
+
         total_pnl = 0.0
         for pos in positions:
             qty = pos.get('quantity', 0)
@@ -283,19 +377,7 @@ def fetch_groww_pnl(account_name, api_key_env, api_secret_env):
                 total_pnl += realised
             else:
                 # Open position — need LTP for unrealised
-                ltp = 0.0
-                exchange = pos.get('exchange', 'NSE')
-                try:
-                    quote = client.get_quote(
-                        pos.get('trading_symbol', ''),
-                        exchange,
-                        client.SEGMENT_FNO
-                    )
-                    if isinstance(quote, dict):
-                        ltp = quote.get('last_price', 0.0)
-                except Exception:
-                    pass
-
+                ltp = ltps.get((pos.get('exchange', 'NSE'), pos.get('trading_symbol', '')), 0.0)
                 net_price = pos.get('net_price', 0.0)
                 unrealised = (ltp - net_price) * qty if ltp > 0 else 0.0
                 total_pnl += unrealised + realised
@@ -310,6 +392,8 @@ def fetch_groww_pnl(account_name, api_key_env, api_secret_env):
         }, None
 
     except Exception as e:
+        if GROWW_AUTH_ERRORS and isinstance(e, GROWW_AUTH_ERRORS) and access_token:
+            token_cache.invalidate(token_key, access_token)
         return None, f"{account_name}: {str(e)}"
 
 
@@ -322,24 +406,47 @@ GROWW_ACCOUNTS = [
 ]
 
 
-def fetch_all_accounts():
+# How long /fetch_live_pnl waits for all accounts together, from submission
+BROKER_FETCH_TIMEOUT = float(os.getenv('BROKER_FETCH_TIMEOUT', '20'))
+
+# Shared pool so a slow broker never holds up the response. A job that misses the deadline
+# keeps its thread until its own HTTP timeouts fire; HTTP_TIMEOUT bounds how long that is.
+_broker_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="broker-fetch")
+
+
+def _account_jobs():
+    """(account_name, callable) for every configured account, in display order."""
+    jobs = [('KITE', fetch_zerodha_pnl)]
+    for acct_name, key_env, secret_env in GROWW_ACCOUNTS:
+        jobs.append((acct_name, partial(fetch_groww_pnl, acct_name, key_env, secret_env)))
+    return jobs
+
+
+def fetch_all_accounts(timeout=None):
     """
-    Fetch live PnL from all configured broker accounts.
+    Fetch live PnL from all configured broker accounts concurrently.
+    All accounts share one deadline: whatever hasn't finished `timeout` seconds
+    (BROKER_FETCH_TIMEOUT by default) after submission is reported as an error, and
+    everything that did finish is still returned. Jobs still queued are cancelled;
+    running ones finish in the background and their result is dropped.
     Returns: (accounts_list, errors_list)
     """
+    timeout = BROKER_FETCH_TIMEOUT if timeout is None else timeout
+    jobs = _account_jobs()
+    futures = [(name, _broker_pool.submit(fn)) for name, fn in jobs]
+    wait([f for _, f in futures], timeout=timeout)
+
     accounts = []
     errors = []
-
-    # Zerodha
-    result, error = fetch_zerodha_pnl()
-    if result:
-        accounts.append(result)
-    if error:
-        errors.append(error)
-
-    # Groww accounts
-    for acct_name, key_env, secret_env in GROWW_ACCOUNTS:
-        result, error = fetch_groww_pnl(acct_name, key_env, secret_env)
+    for name, future in futures:
+        if not future.done():
+            future.cancel()
+            errors.append(f"{name}: no answer within the {timeout:g}s fetch deadline")
+            continue
+        try:
+            result, error = future.result()
+        except Exception as e:
+            result, error = None, f"{name}: {str(e)}"
         if result:
             accounts.append(result)
         if error:
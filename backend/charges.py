@@ -0,0 +1,112 @@
+"""
+Charges — F&O brokerage / statutory charges from dated rate schedules.
+
+Everything works on arrays of fills (one row per executed order), so the live
+estimate for today and a recompute of years of history go through the same
+rules. Rates are picked per fill by trade date, exchange and instrument type;
+add a row to RATE_SCHEDULE when a rate changes instead of editing the maths.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+BROKERAGE_PER_ORDER = 20.0
+GST_RATE = 0.18  # on brokerage + exchange transaction + SEBI fees
+
+OPTION = "OPT"
+FUTURE = "FUT"
+
+Rates = namedtuple("Rates", "effective_from exchange instrument stt_sell exchange_txn sebi stamp_buy")
+
+# Fractions of turnover (premium for options). STT is charged on the sell side, stamp duty on the buy side.
+# Rows are matched by exchange + instrument; the latest effective_from on or before the trade date wins.
+RATE_SCHEDULE = [
+    Rates("2000-01-01", "NFO", OPTION, 0.000625, 0.00053, 0.000001, 0.00003),
+    Rates("2000-01-01", "NFO", FUTURE, 0.000125, 0.00053, 0.000001, 0.00003),
+    Rates("2000-01-01", "BFO", OPTION, 0.000625, 0.00053, 0.000001, 0.00003),
+    Rates("2000-01-01", "BFO", FUTURE, 0.000125, 0.00053, 0.000001, 0.00003),
+    Rates("2000-01-01", "MCX", OPTION, 0.000625, 0.00053, 0.000001, 0.00003),
+    Rates("2000-01-01", "MCX", FUTURE, 0.000125, 0.00053, 0.000001, 0.00003),
+    Rates("2000-01-01", "CDS", OPTION, 0.0, 0.00053, 0.000001, 0.00003),
+    Rates("2000-01-01", "CDS", FUTURE, 0.0, 0.00053, 0.000001, 0.00003),
+    # Oct 2024 revision: higher STT on index derivatives, flat exchange fees
+    Rates("2024-10-01", "NFO", OPTION, 0.001, 0.0003503, 0.000001, 0.00003),
+    Rates("2024-10-01", "NFO", FUTURE, 0.0002, 0.0000173, 0.000001, 0.00003),
+    Rates("2024-10-01", "BFO", OPTION, 0.001, 0.000325, 0.000001, 0.00003),
+    Rates("2024-10-01", "BFO", FUTURE, 0.0002, 0.0, 0.000001, 0.00003),
+]
+# Exchanges missing from the schedule are charged like NFO
+DEFAULT_EXCHANGE = "NFO"
+
+
+def is_option(symbols):
+    """Vectorised option test: trading symbol ends in CE or PE (e.g. NIFTY24O1725000CE)."""
+    symbols = np.asarray(symbols, dtype=str)
+    return np.char.endswith(symbols, "CE") | np.char.endswith(symbols, "PE")
+
+
+def _schedule_rates(dates, exchanges, instruments):
+    """Per-fill (stt_sell, exchange_txn, sebi, stamp_buy) arrays."""
+    n = len(dates)
+    known = {r.exchange for r in RATE_SCHEDULE}
+    exchanges = np.where(np.isin(exchanges, list(known)), exchanges, DEFAULT_EXCHANGE)
+
+    stt = np.zeros(n)
+    exchange_txn = np.zeros(n)
+    sebi = np.zeros(n)
+    stamp = np.zeros(n)
+    # Oldest first, so newer revisions overwrite where they apply
+    for r in sorted(RATE_SCHEDULE, key=lambda r: r.effective_from):
+        mask = (
+            (exchanges == r.exchange)
+            & (instruments == r.instrument)
+            & (dates >= np.datetime64(r.effective_from, "D"))
+        )
+        if mask.any():
+            stt[mask] = r.stt_sell
+            exchange_txn[mask] = r.exchange_txn
+            sebi[mask] = r.sebi
+            stamp[mask] = r.stamp_buy
+    return stt, exchange_txn, sebi, stamp
+
+
+def compute_charges(dates, exchanges, symbols, is_buy, quantities, prices):
+    """
+    Charges for an array of fills. Returns a dict of per-fill arrays:
+    turnover, brokerage, stt, exchange_txn, sebi, stamp_duty, gst, taxes (everything but brokerage).
+    `dates` are trade dates (anything np.datetime64 accepts), `is_buy` a bool array.
+    """
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    exchanges = np.asarray(exchanges, dtype=str)
+    is_buy = np.asarray(is_buy, dtype=bool)
+    quantities = np.asarray(quantities, dtype=float)
+    turnover = quantities * np.asarray(prices, dtype=float)
+    instruments = np.where(is_option(symbols), OPTION, FUTURE)
+
+    stt_rate, txn_rate, sebi_rate, stamp_rate = _schedule_rates(dates, exchanges, instruments)
+
+    brokerage = np.where(quantities > 0, BROKERAGE_PER_ORDER, 0.0)
+    stt = np.where(is_buy, 0.0, turnover * stt_rate)
+    exchange_txn = turnover * txn_rate
+    sebi = turnover * sebi_rate
+    stamp_duty = np.where(is_buy, turnover * stamp_rate, 0.0)
+    gst = (brokerage + exchange_txn + sebi) * GST_RATE
+
+    return {
+        "turnover": turnover,
+        "brokerage": brokerage,
+        "stt": stt,
+        "exchange_txn": exchange_txn,
+        "sebi": sebi,
+        "stamp_duty": stamp_duty,
+        "gst": gst,
+        "taxes": stt + exchange_txn + sebi + stamp_duty + gst,
+    }
+
+
+def total_charges(dates, exchanges, symbols, is_buy, quantities, prices):
+    """(brokerage, taxes) totals for a set of fills — the shape the journal stores."""
+    if len(dates) == 0:
+        return 0.0, 0.0
+    c = compute_charges(dates, exchanges, symbols, is_buy, quantities, prices)
+    return float(c["brokerage"].sum()), float(c["taxes"].sum())
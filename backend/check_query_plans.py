@@ -0,0 +1,136 @@
+"""
+Query-plan regression check: EXPLAIN the hot journal queries and assert each one
+uses the index it was designed for. Works on SQLite and Postgres (DATABASE_URL).
+Exits non-zero if any query falls back to a different plan.
+
+A SQLite database is copied to a temp file and migrated there; the real file is
+never written. Postgres is only read: run the app (or an importer) first so its
+schema is current.
+
+Usage: python3 check_query_plans.py
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+from datetime import date
+
+from dotenv import load_dotenv
+load_dotenv('config.env')
+
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.engine import make_url
+
+import db_models
+from database import SQLALCHEMY_DATABASE_URL, engine
+from db_models import JournalEntry, TwitterLog, JournalImage, DailySummary, Trade, PnlSnapshot
+from migrations import upgrade_schema
+
+START, END = date(2025, 1, 1), date(2025, 12, 31)
+START_TS, END_TS = 1735689600, 1767225599  # START / END as epoch seconds
+DATES = [date(2025, 6, 2), date(2025, 6, 3), date(2025, 6, 4)]
+
+# (description, statement, index expected in the plan) — mirrors routers/journal.py
+HOT_QUERIES = [
+    ("entries by date range",
+     select(JournalEntry).where(JournalEntry.date >= START, JournalEntry.date <= END)
+     .order_by(JournalEntry.date.desc()),
+     "uq_journal_entries_date_account"),
+    ("feed entries for a page of dates",
+     select(JournalEntry).where(JournalEntry.date.in_(DATES)),
+     "uq_journal_entries_date_account"),
+    ("entries for one account",
+     select(JournalEntry).where(JournalEntry.account_name == "KITE", JournalEntry.date >= START),
+     "ix_journal_entries_account_date"),
+    ("twitter logs for an entries date range",
+     select(TwitterLog.date, TwitterLog.twitter_handle, TwitterLog.pnl)
+     .where(TwitterLog.date >= START, TwitterLog.date <= END).order_by(TwitterLog.id),
+     "ix_twitter_logs_date_cover"),
+    ("images for an entries date range",
+     select(JournalImage.date, JournalImage.image_path)
+     .where(JournalImage.date >= START, JournalImage.date <= END).order_by(JournalImage.id),
+     "ix_journal_images_date_cover"),
+    ("twitter logs for dates",
+     select(TwitterLog).where(TwitterLog.date.in_(DATES)),
+     "ix_twitter_logs_date_cover"),
+    ("images for dates",
+     select(JournalImage.date, JournalImage.image_path, JournalImage.thumb_path, JournalImage.medium_path)
+     .where(JournalImage.date.in_(DATES)),
+     "ix_journal_images_date_cover"),
+    ("images by original path",
+     select(JournalImage.id).where(JournalImage.image_path == "uploads/aa/bb/x.png"),
+     "ix_journal_images_image_path"),
+    ("daily rollup for analytics / calendar",
+     select(DailySummary.date, DailySummary.gross_pnl, DailySummary.brokerage,
+            DailySummary.taxes, DailySummary.entry_count)
+     .where(DailySummary.account_name == "ALL").order_by(DailySummary.date),
+     "ix_daily_summary_account_date_cover"),
+    ("trade P&L for an underlying",
+     select(Trade.pnl).where(Trade.underlying == "NIFTY", Trade.date >= START),
+     "ix_trades_underlying_date"),
+    ("intraday P&L for every account (pnl_snapshots.query_range)",
+     select(PnlSnapshot.account_name, PnlSnapshot.ts, PnlSnapshot.m2m)
+     .where(PnlSnapshot.ts >= START_TS, PnlSnapshot.ts <= END_TS)
+     .order_by(PnlSnapshot.account_name, PnlSnapshot.ts),
+     "ix_pnl_snapshots_ts_cover"),
+    ("snapshots due for compaction",
+     select(PnlSnapshot.account_name, PnlSnapshot.ts, PnlSnapshot.m2m)
+     .where(PnlSnapshot.resolution == 0, PnlSnapshot.ts < START_TS),
+     "ix_pnl_snapshots_resolution_ts_cover"),
+]
+
+
+def explain(conn, stmt):
+    sql = str(stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    if conn.dialect.name == "sqlite":
+        rows = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")).fetchall()
+        return "\n".join(str(row[-1]) for row in rows)
+    # Tiny tables make Postgres prefer sequential scans; ask whether the index is usable at all
+    conn.execute(text("SET LOCAL enable_seqscan = off"))
+    return "\n".join(row[0] for row in conn.execute(text(f"EXPLAIN {sql}")))
+
+
+def _sqlite_copy(tmp_dir):
+    """Engine on a migrated copy of the configured SQLite database (or a fresh schema)."""
+    path = make_url(SQLALCHEMY_DATABASE_URL).database
+    copy = os.path.join(tmp_dir, "plans.db")
+    if path and path != ":memory:" and os.path.exists(path):
+        src = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        dst = sqlite3.connect(copy)
+        src.backup(dst)
+        src.close()
+        dst.close()
+    check_engine = create_engine(f"sqlite:///{copy}")
+    db_models.Base.metadata.create_all(bind=check_engine)
+    upgrade_schema(check_engine)
+    return check_engine
+
+
+def run_checks():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        check_engine = _sqlite_copy(tmp_dir) if engine.dialect.name == "sqlite" else engine
+        try:
+            return _check_plans(check_engine)
+        finally:
+            if check_engine is not engine:
+                check_engine.dispose()
+
+
+def _check_plans(check_engine):
+    failures = 0
+    # Always rolled back, so SET LOCAL (Postgres) never outlives the check
+    with check_engine.connect() as conn, conn.begin() as tx:
+        for description, stmt, index in HOT_QUERIES:
+            plan = explain(conn, stmt)
+            ok = index in plan
+            failures += not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {description}: expected {index}")
+            if not ok:
+                print("     " + plan.replace("\n", "\n     "))
+        tx.rollback()
+    print(f"{len(HOT_QUERIES) - failures}/{len(HOT_QUERIES)} query plans use their index.")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if run_checks() else 1)
@@ -0,0 +1,142 @@
+"""
+Cost Distribution — spread period-level brokerage / taxes (e.g. from a broker's
+annual statement) over one account's trading days.
+
+Each period is applied with a single UPDATE on that account's journal_entries
+rows, weighted equally, by turnover or by order count. Other accounts, notes,
+twitter logs and images are never touched. All periods run in one transaction.
+
+Turnover / order count come from the row itself (Groww importers) or, failing
+that, from the day's stored trades (Kite fills, Groww round trips). A period
+with days that have neither is rejected for those weightings — use "equal".
+"""
+from datetime import date
+
+from sqlalchemy import case, func, literal, select, update
+
+from db_models import JournalEntry, Trade
+from journal_service import refresh_daily_summary, bump_journal_version, forget_imported_days
+from trades import SOURCE_GROWW_CSV
+
+
+def _trades_per_day(aggregate):
+    """Correlated per-(account, date) aggregate over the trades table; NULL without trades."""
+    return (
+        select(aggregate)
+        .where(Trade.account_name == JournalEntry.account_name, Trade.date == JournalEntry.date)
+        .correlate(JournalEntry)
+        .scalar_subquery()
+    )
+
+
+# Per-day weight expression, NULL when the day has no data for it
+WEIGHTINGS = {
+    "equal": literal(1.0),
+    "turnover": func.coalesce(
+        JournalEntry.turnover,
+        _trades_per_day(func.sum(Trade.buy_value + Trade.sell_value)),
+    ),
+    "order_count": func.coalesce(
+        JournalEntry.order_count,
+        # Kite rows are single fills; a Groww round trip is a buy and a sell order
+        _trades_per_day(func.sum(case((Trade.source == SOURCE_GROWW_CSV, 2), else_=1))),
+    ),
+}
+
+
+def _period_filter(account, start, end):
+    conditions = [JournalEntry.account_name == account]
+    if start is not None:
+        conditions.append(JournalEntry.date >= start)
+    if end is not None:
+        conditions.append(JournalEntry.date <= end)
+    return conditions
+
+
+def _check_periods(periods):
+    """Periods are dicts with start_date / end_date (date or None = open) and brokerage / taxes totals."""
+    ordered = sorted(periods, key=lambda p: p["start_date"] or date.min)
+    for prev, cur in zip(ordered, ordered[1:]):
+        prev_end = prev["end_date"] or date.max
+        if (cur["start_date"] or date.min) <= prev_end:
+            raise ValueError(f"Periods overlap: {prev['start_date']}..{prev['end_date']} and "
+                             f"{cur['start_date']}..{cur['end_date']}")
+    for p in periods:
+        if p["start_date"] and p["end_date"] and p["start_date"] > p["end_date"]:
+            raise ValueError(f"Period starts after it ends: {p['start_date']}..{p['end_date']}")
+
+
+def distribute_costs(db, account, periods, weighting="equal", dry_run=False):
+    """
+    Set brokerage / taxes on `account`'s rows so each period's rows sum to its totals.
+    With dry_run nothing is written and every affected day is listed with its new values.
+    Raises ValueError for unknown weightings, overlapping periods or days without weight data.
+    """
+    if weighting not in WEIGHTINGS:
+        raise ValueError(f"Unknown weighting '{weighting}'. Use one of: {', '.join(WEIGHTINGS)}")
+    _check_periods(periods)
+    weight = WEIGHTINGS[weighting]
+
+    # Validate every period before writing anything
+    stats = []
+    for p in periods:
+        conditions = _period_filter(account, p["start_date"], p["end_date"])
+        days, weighted_days, total_weight = db.query(
+            func.count(JournalEntry.id), func.count(weight), func.sum(weight)
+        ).filter(*conditions).one()
+        total_weight = float(total_weight or 0.0)
+        if weighted_days < days:
+            raise ValueError(
+                f"{days - weighted_days} of {days} {account} days between {p['start_date']} and {p['end_date']} "
+                f"have no {weighting} data (imported or from stored trades); use weighting 'equal'"
+            )
+        if days and total_weight <= 0:
+            raise ValueError(f"No {weighting} data for {account} between {p['start_date']} and {p['end_date']}")
+        stats.append((p, conditions, days, total_weight))
+
+    results = []
+    touched_dates = set()
+    for p, conditions, days, total_weight in stats:
+        result = {
+            "start_date": p["start_date"].isoformat() if p["start_date"] else None,
+            "end_date": p["end_date"].isoformat() if p["end_date"] else None,
+            "brokerage": p["brokerage"],
+            "taxes": p["taxes"],
+            "days": days,
+            "total_weight": total_weight,
+        }
+
+        if dry_run:
+            rows = db.query(
+                JournalEntry.date, weight, JournalEntry.brokerage, JournalEntry.taxes
+            ).filter(*conditions).order_by(JournalEntry.date)
+            result["preview"] = [
+                {
+                    "date": d.isoformat(),
+                    "weight": float(w),
+                    "brokerage": round(p["brokerage"] * float(w) / total_weight, 2),
+                    "taxes": round(p["taxes"] * float(w) / total_weight, 2),
+                    "current_brokerage": brokerage,
+                    "current_taxes": taxes,
+                }
+                for d, w, brokerage, taxes in rows
+            ]
+        elif days:
+            touched_dates.update(d for (d,) in db.query(JournalEntry.date).filter(*conditions).distinct())
+            share = weight / total_weight
+            db.execute(
+                update(JournalEntry)
+                .where(*conditions)
+                .values(brokerage=p["brokerage"] * share, taxes=p["taxes"] * share)
+                .execution_options(synchronize_session=False)
+            )
+        results.append(result)
+
+    if not dry_run and touched_dates:
+        refresh_daily_summary(db, sorted(touched_dates))
+        # The charges are no longer the importer's, so a re-import must not treat these days as unchanged
+        forget_imported_days(db, touched_dates, [account])
+        bump_journal_version(db)
+        db.commit()
+
+    return {"account_name": account, "weighting": weighting, "dry_run": dry_run, "periods": results}
@@ -1,13 +1,37 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+import asyncio
 import os
 
+try:
+    from sqlalchemy.ext.asyncio import create_async_engine
+except ImportError:
+    create_async_engine = None
+
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./trading_journal.db")
+IS_SQLITE = SQLALCHEMY_DATABASE_URL.startswith("sqlite")
+
+# SQLite production profile ("legacy" = plain pysqlite defaults, kept for benchmarking)
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "production")
+# Seconds a writer waits for the lock before "database is locked"
+SQLITE_BUSY_TIMEOUT = float(os.getenv("SQLITE_BUSY_TIMEOUT", "30"))
+SQLITE_PRAGMAS = [
+    ("journal_mode", "WAL"),  # readers never block on the writer and vice versa
+    ("synchronous", "NORMAL"),  # fsync at checkpoints only; safe with WAL
+    ("busy_timeout", str(int(SQLITE_BUSY_TIMEOUT * 1000))),
+    ("cache_size", "-65536"),  # 64 MiB page cache per connection
+    ("mmap_size", str(256 * 1024 * 1024)),
+    ("temp_store", "MEMORY"),
+]
+# Execution option that makes a transaction start with BEGIN IMMEDIATE (see write sessions below)
+SQLITE_IMMEDIATE = "sqlite_immediate"
 
 # Conditional connect_args based on database type
-if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
+if IS_SQLITE:
     connect_args = {"check_same_thread": False}
+    if SQLITE_PROFILE == "production":
+        connect_args["timeout"] = SQLITE_BUSY_TIMEOUT
     extra_args = {}
 else:
     connect_args = {}
@@ -20,17 +44,103 @@ else:
     }
 
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, 
+    SQLALCHEMY_DATABASE_URL,
     connect_args=connect_args,
     **extra_args
 )
+
+def _apply_sqlite_pragmas(dbapi_connection):
+    cursor = dbapi_connection.cursor()
+    for pragma, value in SQLITE_PRAGMAS:
+        cursor.execute(f"PRAGMA {pragma}={value}")
+    cursor.close()
+
+if IS_SQLITE and SQLITE_PROFILE == "production":
+    @event.listens_for(engine, "connect")
+    def _sqlite_on_connect(dbapi_connection, connection_record):
+        # Take transaction control away from pysqlite so writers can BEGIN IMMEDIATE
+        dbapi_connection.isolation_level = None
+        _apply_sqlite_pragmas(dbapi_connection)
+
+    @event.listens_for(engine, "begin")
+    def _sqlite_on_begin(conn):
+        # Writers take the write lock up front and queue on busy_timeout. A deferred
+        # transaction that reads first can't wait for the lock when it later writes
+        # (SQLITE_BUSY_SNAPSHOT), which is where "database is locked" came from.
+        conn.exec_driver_sql("BEGIN IMMEDIATE" if conn.get_execution_options().get(SQLITE_IMMEDIATE) else "BEGIN")
+
+# Sessions for read-then-write work (API writes, importers, the live PnL lease).
+# On Postgres the option is ignored and this is the same as SessionLocal.
+write_engine = engine.execution_options(**{SQLITE_IMMEDIATE: True})
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+WriteSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=write_engine)
 
 Base = declarative_base()
 
+# ─── Async read path ────────────────────────────────────────────────
+# Read-heavy routes run their queries on an async engine (aiosqlite / asyncpg) so
+# they don't tie up a threadpool worker per request. Writes stay on the sync engine.
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+def _async_url(url):
+    scheme, rest = url.split("://", 1)
+    driver = ASYNC_DRIVERS.get(scheme.split("+", 1)[0])
+    if driver is None:
+        return None
+    if driver.endswith("asyncpg"):
+        # asyncpg spells libpq's sslmode as ssl
+        rest = rest.replace("sslmode=", "ssl=")
+    return f"{driver}://{rest}"
+
+def _create_async_engine():
+    url = _async_url(SQLALCHEMY_DATABASE_URL)
+    if create_async_engine is None or url is None:
+        return None
+    async_connect_args = {"timeout": SQLITE_BUSY_TIMEOUT} if IS_SQLITE and SQLITE_PROFILE == "production" else {}
+    try:
+        async_engine = create_async_engine(url, connect_args=async_connect_args, **extra_args)
+    except ImportError:
+        # aiosqlite / asyncpg not installed
+        return None
+    if IS_SQLITE and SQLITE_PROFILE == "production":
+        event.listen(async_engine.sync_engine, "connect", lambda conn, record: _apply_sqlite_pragmas(conn))
+    return async_engine
+
+async_engine = _create_async_engine()
+
+def _read_sync(statement):
+    with engine.connect() as conn:
+        return conn.execute(statement).all()
+
+async def _read_async(statement):
+    async with async_engine.connect() as conn:
+        return (await conn.execute(statement)).all()
+
+async def read_all(*statements):
+    """
+    Run independent SELECTs concurrently, each on its own pooled connection, and
+    return their rows in the same order. Without an async driver the sync engine
+    is used from worker threads instead.
+    """
+    if async_engine is not None:
+        return await asyncio.gather(*(_read_async(s) for s in statements))
+    return await asyncio.gather(*(asyncio.to_thread(_read_sync, s) for s in statements))
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+def get_write_db():
+    db = WriteSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -1,26 +1,36 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Text, Date
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Text, Date, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from database import Base
 from datetime import datetime
 
 class JournalEntry(Base):
     __tablename__ = "journal_entries"
+    __table_args__ = (
+        # One row per account per day; also serves date-range scans (feed, entries)
+        Index("uq_journal_entries_date_account", "date", "account_name", unique=True),
+        # Account-filtered date ranges (entries?account=, cost distribution)
+        Index("ix_journal_entries_account_date", "account_name", "date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    date = Column(Date, index=True)
-    account_name = Column(String, index=True)
+    date = Column(Date)
+    account_name = Column(String)
     pnl = Column(Float)
     brokerage = Column(Float, default=0.0)
     taxes = Column(Float, default=0.0)
+    turnover = Column(Float, nullable=True)  # from imports that report it; weights cost distribution
+    order_count = Column(Integer, nullable=True)
     notes = Column(Text, nullable=True)
     image_path = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
 class TwitterLog(Base):
     __tablename__ = "twitter_logs"
+    # Covering index for the date IN (...) lookups of entries / feed / daily_log
+    __table_args__ = (Index("ix_twitter_logs_date_cover", "date", "twitter_handle", "pnl"),)
 
     id = Column(Integer, primary_key=True, index=True)
-    date = Column(Date, index=True)
+    date = Column(Date)
     twitter_handle = Column(String)
     pnl = Column(Float)
 
@@ -42,7 +52,117 @@ class MarketContext(Base):
 
 class JournalImage(Base):
     __tablename__ = "journal_images"
+    __table_args__ = (
+        # Covering index for the date IN (...) lookups of entries / feed / daily_log
+        Index("ix_journal_images_date_cover", "date", "image_path", "thumb_path", "medium_path"),
+        # Derivative pipeline updates rows by original path
+        Index("ix_journal_images_image_path", "image_path"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    date = Column(Date, index=True)
+    date = Column(Date)
     image_path = Column(String)
+    # WebP derivatives, filled in by the background pipeline (image_derivatives.py)
+    thumb_path = Column(String, nullable=True)
+    medium_path = Column(String, nullable=True)
+
+class DailySummary(Base):
+    """Per-day rollup of journal_entries, one row per (date, account) plus an ALL row per date."""
+    __tablename__ = "daily_summary"
+    __table_args__ = (
+        UniqueConstraint("date", "account_name", name="uq_daily_summary_date_account"),
+        # Covers stats / analytics / calendar: account_name = ? ORDER BY date
+        Index("ix_daily_summary_account_date_cover",
+              "account_name", "date", "gross_pnl", "brokerage", "taxes", "entry_count"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    date = Column(Date)
+    account_name = Column(String)  # "ALL" for the combined row
+    gross_pnl = Column(Float, default=0.0)
+    brokerage = Column(Float, default=0.0)
+    taxes = Column(Float, default=0.0)
+    net_pnl = Column(Float, default=0.0)
+    entry_count = Column(Integer, default=0)
+
+class JournalVersion(Base):
+    """Single-row counter bumped on every journal write; used for ETags and cache keys."""
+    __tablename__ = "journal_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, default=0, nullable=False)
+
+class LivePnlState(Base):
+    """
+    Latest live PnL snapshot shared by all workers, plus the lease that elects
+    the single background poller for the deployment.
+    """
+    __tablename__ = "live_pnl_state"
+
+    key = Column(String, primary_key=True)
+    payload = Column(Text, nullable=True)  # JSON: {"date", "accounts", "errors", "fetched_at"}
+    fetched_at = Column(Float, default=0.0)  # epoch seconds
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(Float, default=0.0)
+    demand_at = Column(Float, default=0.0)  # last time any worker had a live subscriber
+
+class PnlSnapshot(Base):
+    """
+    Append-only intraday MTM per account. Raw captures have resolution 0; older
+    days are compacted into 60s / 300s buckets (see pnl_snapshots.py).
+    The composite primary key doubles as the (account, time range) index; the
+    all-accounts range query and compaction each get a covering index of their own.
+    """
+    __tablename__ = "pnl_snapshots"
+    __table_args__ = (
+        Index("ix_pnl_snapshots_ts_cover", "ts", "account_name", "m2m"),
+        Index("ix_pnl_snapshots_resolution_ts_cover", "resolution", "ts", "account_name", "m2m"),
+    )
+
+    account_name = Column(String, primary_key=True)
+    ts = Column(Integer, primary_key=True)  # epoch seconds (bucket start for compacted rows)
+    resolution = Column(Integer, primary_key=True, default=0)  # seconds; 0 = raw capture
+    m2m = Column(Float)
+
+class ImportSource(Base):
+    """Import ledger: last file imported per (format, account, source path) — see importers/ledger.py."""
+    __tablename__ = "import_sources"
+    __table_args__ = (UniqueConstraint("fmt", "account_name", "source_path", name="uq_import_source"),)
+
+    id = Column(Integer, primary_key=True)
+    fmt = Column(String, nullable=False)
+    account_name = Column(String, nullable=False)
+    source_path = Column(String, nullable=False)
+    file_hash = Column(String, nullable=False)  # sha256 of the whole file
+    watermark = Column(Date, nullable=True)  # latest date the file contained
+    imported_at = Column(DateTime, default=datetime.utcnow)
+
+class ImportedDay(Base):
+    """Content hash of the values last imported for each (account, date); unchanged days are skipped."""
+    __tablename__ = "imported_days"
+
+    account_name = Column(String, primary_key=True)
+    date = Column(Date, primary_key=True)
+    content_hash = Column(String, nullable=False)
+
+class Trade(Base):
+    """
+    Trade-level detail behind the daily journal rows: round trips from the Groww
+    trade CSV (with realised P&L) and Kite fills (pnl left NULL — buy/sell value carry it).
+    """
+    __tablename__ = "trades"
+    __table_args__ = (
+        Index("ix_trades_account_date", "account_name", "date"),
+        Index("ix_trades_underlying_date", "underlying", "date"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    account_name = Column(String, nullable=False)
+    date = Column(Date, nullable=False)  # sell date for round trips, fill date for orders
+    symbol = Column(String, nullable=False)
+    underlying = Column(String, nullable=False)  # e.g. NIFTY, BANKNIFTY
+    quantity = Column(Integer, default=0)
+    buy_value = Column(Float, default=0.0)
+    sell_value = Column(Float, default=0.0)
+    pnl = Column(Float, nullable=True)
+    source = Column(String, nullable=False)  # groww-csv | kite
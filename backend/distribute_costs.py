@@ -1,136 +1,79 @@
-import json
-import requests
-import sys
-import os
+"""
+Spread period-level brokerage / taxes over one account's trading days.
+
+Usage: python3 distribute_costs.py [--account KITE] [--weighting equal|turnover|order_count] [--dry-run]
+                                   --period START:END:BROKERAGE:TAXES [--period ...]
+START / END are YYYY-MM-DD and may be left empty for an open-ended period,
+e.g. --period :2025-05-31:42000:169000 --period 2025-06-02::427000:893000
+"""
+import argparse
+from datetime import datetime
+
+from dotenv import load_dotenv
+load_dotenv('config.env')
+
+from database import WriteSessionLocal
+from migrations import prepare_database
+from cost_distribution import WEIGHTINGS, distribute_costs
 
-API_URL = "http://localhost:8000/journal"
 ACCOUNT_NAME = "KITE"
-INPUT_FILE = "pnl_data.json"
 
+# Whole history when no --period is given
 TOTAL_BROKERAGE = 500000.0
 TOTAL_TAXES = 1170000.0
 
-def get_days_from_json():
-    if not os.path.exists(INPUT_FILE):
-        print(f"Error: {INPUT_FILE} not found.")
-        return []
 
+def parse_period(value):
     try:
-        with open(INPUT_FILE, 'r') as f:
-            data = json.load(f)
-    except:
-        return []
-
-    # Dictionary Format
-    result_data = data.get('data', {}).get('result', {})
-    
-    dates = []
-    
-    # Case 1: Dict of Segments -> Dict of Date:PnL
-    if isinstance(result_data, dict) and any(isinstance(v, dict) for v in result_data.values()):
-        for segment, dates_dict in result_data.items():
-            if isinstance(dates_dict, dict):
-                dates.extend(dates_dict.keys())
-    
-    # Case 2: List of objects
-    elif isinstance(result_data, list):
-        for row in result_data:
-            if 'date' in row: dates.append(row['date'])
-            
-    # Case 3: Root List
-    elif isinstance(data, list):
-        for row in data:
-            if 'date' in row: dates.append(row['date'])
-            
-    return sorted(list(set(dates))) # Unique dates
-
-def update_entry(date_str, daily_brok, daily_tax):
-    try:
-        # Fetch Existing
-        day_resp = requests.get(f"{API_URL}/entries", params={"start_date": date_str, "end_date": date_str})
-        day_data = day_resp.json() if day_resp.status_code == 200 else []
-        
-        current_accs = []
-        current_notes = ""
-        current_img = None
-        current_tw = []
-        
-        kite_found = False
-        kite_pnl = 0.0
-
-        if day_data:
-            entry = day_data[0]
-            current_notes = entry.get('notes')
-            current_img = entry.get('image_path')
-            # Fix: Twitter logs are unique per day, but structure might duplicate.
-            # entry['twitter_logs'] is the list.
-            current_tw = entry.get('twitter_logs', [])
-            
-            seen = set()
-            for e in day_data:
-                if e['account_name'] == ACCOUNT_NAME:
-                    kite_found = True
-                    kite_pnl = e['pnl']
-                    # We are UPDATING this one, so don't add to current_accs yet
-                elif e['account_name'] not in seen:
-                    current_accs.append({
-                        "account_name": e['account_name'],
-                        "pnl": e['pnl'], "brokerage": e['brokerage'], "taxes": e['taxes']
-                    })
-                    seen.add(e['account_name'])
-        
-        # If KITE entry didn't exist, we probably shouldn't be running this script?
-        # But `import` just ran, so it should exist.
-        # If not, we skip or create with 0 pnl? Let's assume valid.
-        
-        # Add Updated KITE
-        current_accs.append({
-            "account_name": ACCOUNT_NAME,
-            "pnl": kite_pnl, # Preserve PnL
-            "brokerage": daily_brok,
-            "taxes": daily_tax
-        })
-
-        payload = {
-            "date": date_str,
-            "notes": current_notes,
-            "image_path": current_img,
-            "accounts": current_accs,
-            "twitter_logs": current_tw
+        start, end, brokerage, taxes = value.split(":")
+        return {
+            "start_date": datetime.strptime(start, "%Y-%m-%d").date() if start else None,
+            "end_date": datetime.strptime(end, "%Y-%m-%d").date() if end else None,
+            "brokerage": float(brokerage),
+            "taxes": float(taxes),
         }
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected START:END:BROKERAGE:TAXES, got '{value}'")
+
+
+def run_distribution(periods, account=ACCOUNT_NAME, weighting="equal", dry_run=False):
+    prepare_database()
+
+    db = WriteSessionLocal()
+    try:
+        result = distribute_costs(db, account, periods, weighting, dry_run)
+    except ValueError as e:
+        db.rollback()
+        print(f"Error: {e}")
+        return None
+    finally:
+        db.close()
+
+    for p in result["periods"]:
+        days = p["days"] or 1
+        print(f"{p['start_date'] or 'start'} -> {p['end_date'] or 'end'}: {p['days']} days, "
+              f"avg brokerage ₹{p['brokerage'] / days:.2f}, avg taxes ₹{p['taxes'] / days:.2f} per day")
+        for day in p.get("preview", []):
+            print(f"  {day['date']}  brokerage {day['current_brokerage']} -> {day['brokerage']}  "
+                  f"taxes {day['current_taxes']} -> {day['taxes']}")
+    print("Dry run, nothing written." if dry_run else f"Done! Costs distributed over {account}'s days.")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distribute period-level costs over an account's days.")
+    parser.add_argument("--account", default=ACCOUNT_NAME)
+    parser.add_argument("--weighting", choices=list(WEIGHTINGS), default="equal",
+                        help="turnover / order_count need imported values or stored trades for every day")
+    parser.add_argument("--period", action="append", type=parse_period, dest="periods")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    periods = args.periods or [
+        {"start_date": None, "end_date": None, "brokerage": TOTAL_BROKERAGE, "taxes": TOTAL_TAXES}
+    ]
+    run_distribution(periods, args.account, args.weighting, args.dry_run)
 
-        resp = requests.post(f"{API_URL}/daily_log", json=payload)
-        if resp.status_code != 200:
-            print(f"Failed {date_str}: {resp.text}")
-            
-    except Exception as e:
-        print(f"Error {date_str}: {e}")
-
-def run_distribution():
-    print("Calculating distribution...")
-    dates = get_days_from_json()
-    
-    count = len(dates)
-    if count == 0:
-        print("No dates found in JSON.")
-        return
-        
-    daily_brokerage = TOTAL_BROKERAGE / count
-    daily_taxes = TOTAL_TAXES / count
-    
-    print(f"Found {count} days.")
-    print(f"Daily Brokerage: {daily_brokerage:.2f}")
-    print(f"Daily Taxes: {daily_taxes:.2f}")
-    
-    print("Applying updates...")
-    
-    processed = 0
-    for d in dates:
-        update_entry(d, daily_brokerage, daily_taxes)
-        processed += 1
-        if processed % 10 == 0: print(f"Updated {processed}...")
-        
-    print(f"Done! Distributed costs over {processed} days.")
 
 if __name__ == "__main__":
-    run_distribution()
+    main()
@@ -0,0 +1,133 @@
+"""
+Image Derivatives — background thumbnail / medium WebP generation for journal images.
+Uploads are queued onto a small worker pool; finished derivatives are recorded on
+every JournalImage row that points at the original.
+"""
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+from database import SessionLocal, WriteSessionLocal
+from db_models import JournalImage
+
+# variant -> bounding box (longest side); feed defaults to the smallest
+VARIANTS = {
+    "thumb": 320,
+    "medium": 1280,
+}
+WEBP_QUALITY = 80
+
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("IMAGE_WORKERS", "2")),
+    thread_name_prefix="image-derivatives",
+)
+# image_path -> Future; the same content-addressed upload is only rendered once at a time
+_pending = {}
+_pending_lock = threading.Lock()
+
+
+def derivative_path(image_path, variant):
+    """uploads/aa/bb/<hash>.png -> uploads/aa/bb/<hash>_<variant>.webp"""
+    return f"{os.path.splitext(image_path)[0]}_{variant}.webp"
+
+
+def existing_derivatives(image_path):
+    """{'thumb': path|None, 'medium': path|None} for derivatives already on disk."""
+    result = {}
+    for variant in VARIANTS:
+        path = derivative_path(image_path, variant)
+        result[variant] = path if os.path.exists(path) else None
+    return result
+
+
+def _render(image_path):
+    """Write every missing derivative for one image. Returns the derivative paths."""
+    with Image.open(image_path) as src:
+        src.load()
+        if src.mode not in ("RGB", "RGBA"):
+            src = src.convert("RGBA")
+        for variant, box in VARIANTS.items():
+            out_path = derivative_path(image_path, variant)
+            if os.path.exists(out_path):
+                continue
+            img = src.copy()
+            img.thumbnail((box, box))
+            # Unique temp name: a backfill can render the same image as a queued job
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(out_path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    img.save(f, "WEBP", quality=WEBP_QUALITY, method=4)
+                os.replace(tmp_path, out_path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+    return {variant: derivative_path(image_path, variant) for variant in VARIANTS}
+
+
+def _record(image_path, paths):
+    db = WriteSessionLocal()
+    try:
+        db.query(JournalImage).filter(JournalImage.image_path == image_path).update(
+            {"thumb_path": paths["thumb"], "medium_path": paths["medium"]},
+            synchronize_session=False,
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def generate_derivatives(image_path):
+    """Render derivatives for one image and store their paths. Errors are swallowed (originals still work)."""
+    if Image is None or not os.path.exists(image_path):
+        return None
+    try:
+        paths = _render(image_path)
+        _record(image_path, paths)
+        return paths
+    except Exception as e:
+        print(f"Derivative generation failed for {image_path}: {e}")
+        return None
+
+
+def _run_queued(image_path):
+    try:
+        return generate_derivatives(image_path)
+    finally:
+        with _pending_lock:
+            _pending.pop(image_path, None)
+
+
+def queue_derivatives(image_path):
+    """Schedule derivative generation on the worker pool (a no-op if that image is already queued)."""
+    if Image is None:
+        return None
+    with _pending_lock:
+        future = _pending.get(image_path)
+        if future is None:
+            future = _pending[image_path] = _executor.submit(_run_queued, image_path)
+        return future
+
+
+def backfill_derivatives():
+    """Generate derivatives for every stored image that doesn't have them yet."""
+    db = SessionLocal()
+    try:
+        pending = {
+            path for (path,) in db.query(JournalImage.image_path)
+            .filter((JournalImage.thumb_path.is_(None)) | (JournalImage.medium_path.is_(None)))
+            .distinct()
+        }
+    finally:
+        db.close()
+
+    print(f"Generating derivatives for {len(pending)} images...")
+    done = sum(1 for path in pending if generate_derivatives(path))
+    print(f"Done. {done}/{len(pending)} images processed.")
+
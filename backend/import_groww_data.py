@@ -1,101 +1,15 @@
-import json
-import requests
-import sys
-import os
+"""Import groww_me_data.json into GROWW-ME. Thin wrapper around `python -m importers groww-heatmap`."""
+from dotenv import load_dotenv
+load_dotenv('config.env')
+
+from importers import run_import
 
-API_URL = "http://localhost:8000/journal"
 ACCOUNT_NAME = "GROWW-ME"
 INPUT_FILE = "groww_me_data.json"
 
-def save_entry(date_str, gross_pnl, brokerage, taxes):
-    try:
-        try:
-            day_resp = requests.get(f"{API_URL}/entries", params={"start_date": date_str, "end_date": date_str})
-            day_data = day_resp.json() if day_resp.status_code == 200 else []
-        except:
-            day_data = []
-
-        current_accs = []
-        current_notes = ""
-        current_img = None
-        current_tw = []
-
-        if day_data:
-            entry = day_data[0]
-            current_notes = entry.get('notes')
-            current_img = entry.get('image_path')
-            current_tw = entry.get('twitter_logs', [])
-            seen = set()
-            for e in day_data:
-                # Keep other accounts, remove current if exists (to update)
-                if e['account_name'] != ACCOUNT_NAME and e['account_name'] not in seen:
-                    current_accs.append({
-                        "account_name": e['account_name'],
-                        "pnl": e['pnl'], "brokerage": e['brokerage'], "taxes": e['taxes']
-                    })
-                    seen.add(e['account_name'])
-
-        current_accs.append({
-            "account_name": ACCOUNT_NAME,
-            "pnl": gross_pnl,
-            "brokerage": brokerage,
-            "taxes": taxes
-        })
-
-        payload = {
-            "date": date_str,
-            "notes": current_notes,
-            "image_path": current_img,
-            "accounts": current_accs,
-            "twitter_logs": current_tw
-        }
-
-        requests.post(f"{API_URL}/daily_log", json=payload)
-    except Exception as e:
-        print(f"Error saving {date_str}: {e}")
-
-def run_import():
-    if not os.path.exists(INPUT_FILE):
-        print(f"Error: {INPUT_FILE} not found.")
-        return
-
-    with open(INPUT_FILE, 'r') as f:
-        try:
-            data = json.load(f)
-        except:
-            print("Invalid JSON.")
-            return
-
-    # Structure check for Groww format
-    # "dailyRealisedPnLHeatmap": { "2025-09-05": { "grossPnl": ... } }
-    realised_data = data.get('success', {}).get('response', {}).get('dailyRealisedPnLHeatmap', {})
-    
-    if not realised_data:
-        # Try finding it if structure is slightly different or top-level
-        realised_data = data.get('response', {}).get('dailyRealisedPnLHeatmap', {})
-        if not realised_data:
-            realised_data = data.get('dailyRealisedPnLHeatmap', {})
-
-    if not realised_data:
-        print("Could not find 'dailyRealisedPnLHeatmap' in JSON.")
-        return
-
-    print(f"Found {len(realised_data)} entries for {ACCOUNT_NAME}...")
-    
-    total_imported = 0
-    for date_str, details in realised_data.items():
-        if not isinstance(details, dict): continue
-        
-        gross_pnl = float(details.get('grossPnl', 0.0))
-        brokerage = float(details.get('brokerage', 0.0))
-        taxes = float(details.get('charges', 0.0)) # Mapping 'charges' to 'taxes' as per instruction
-        
-        save_entry(date_str, gross_pnl, brokerage, taxes)
-        
-        total_imported += 1
-        if total_imported % 10 == 0: print(f"Imported {total_imported} entries...")
-
-    print(f"Done. Total imported: {total_imported}")
-
 if __name__ == "__main__":
-    run_import()
+    try:
+        inserted, updated, skipped = run_import("groww-heatmap", INPUT_FILE, ACCOUNT_NAME)
+        print(f"Done. {inserted} inserted, {updated} updated, {skipped} unchanged.")
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
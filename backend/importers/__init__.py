@@ -0,0 +1,14 @@
+"""
+Importers — load historical PnL exports straight into the journal database.
+
+Each file format is a parser plugin (see base.register) that streams records
+out of the file; run_import() writes them through journal_service in batched
+transactions, skipping files and days the import ledger (ledger.py) has
+already seen. CLI: python -m importers <format> <file> [--account NAME]
+"""
+from importers.base import PARSERS, BATCH_SIZE, register, run_import
+
+# Built-in parsers register themselves on import
+from importers import zerodha_json, groww_heatmap, groww_csv  # noqa: F401
+
+__all__ = ["PARSERS", "BATCH_SIZE", "register", "run_import"]
@@ -0,0 +1,40 @@
+"""
+Usage: python -m importers <format> <file> [--account NAME] [--batch-size N] [--force]
+                           [--total-brokerage X --total-taxes Y]   (groww-csv only)
+"""
+import argparse
+
+from dotenv import load_dotenv
+load_dotenv('config.env')
+
+from importers import PARSERS, BATCH_SIZE, run_import
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m importers", description="Import PnL exports into the journal.")
+    parser.add_argument("format", choices=sorted(PARSERS))
+    parser.add_argument("file")
+    parser.add_argument("--account", help="journal account name (default depends on the format)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--force", action="store_true", help="rewrite every day even if the ledger says it is unchanged")
+    parser.add_argument("--total-brokerage", type=float, help="groww-csv: report brokerage to spread by trade count")
+    parser.add_argument("--total-taxes", type=float, help="groww-csv: report taxes to spread by turnover")
+    args = parser.parse_args()
+
+    options = {}
+    if args.total_brokerage is not None:
+        options["total_brokerage"] = args.total_brokerage
+    if args.total_taxes is not None:
+        options["total_taxes"] = args.total_taxes
+
+    try:
+        inserted, updated, skipped = run_import(
+            args.format, args.file, args.account, args.batch_size, force=args.force, **options
+        )
+    except (ValueError, FileNotFoundError) as e:
+        parser.error(str(e))
+    print(f"Done. {inserted} inserted, {updated} updated, {skipped} unchanged.")
+
+
+if __name__ == "__main__":
+    main()
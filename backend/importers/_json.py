@@ -0,0 +1,42 @@
+"""Streaming JSON helpers — ijson when installed, json.load otherwise."""
+import json
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+def _lookup(data, prefix):
+    for key in prefix.split(".") if prefix else []:
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
+
+
+def kvitems(path, prefix):
+    """(key, value) pairs of the object at dotted `prefix`; nothing if it isn't an object."""
+    if ijson is None:
+        obj = _lookup(_load(path), prefix)
+        if isinstance(obj, dict):
+            yield from obj.items()
+        return
+    with open(path, "rb") as f:
+        yield from ijson.kvitems(f, prefix, use_float=True)
+
+
+def items(path, prefix):
+    """Elements of the array at dotted `prefix`; nothing if it isn't an array."""
+    if ijson is None:
+        obj = _lookup(_load(path), prefix)
+        if isinstance(obj, list):
+            yield from obj
+        return
+    with open(path, "rb") as f:
+        yield from ijson.items(f, f"{prefix}.item" if prefix else "item", use_float=True)
+
+
+def _load(path):
+    with open(path, "r") as f:
+        return json.load(f)
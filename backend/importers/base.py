@@ -0,0 +1,142 @@
+"""Parser registry and the batched database writer shared by every importer."""
+import os
+from itertools import islice
+
+# format name -> parser(path, account, **options) yielding record dicts
+# (date: datetime.date, account_name, pnl, brokerage, taxes); parsers of trade-level
+# files also carry a `trades(path)` generator of trade rows
+PARSERS = {}
+
+BATCH_SIZE = 500
+
+
+def register(name, default_account=None, trades=None):
+    """Decorator adding a parser plugin under `name`."""
+    def wrap(func):
+        func.default_account = default_account
+        func.trades = trades
+        PARSERS[name] = func
+        return func
+    return wrap
+
+
+def _batches(records, size):
+    records = iter(records)
+    while True:
+        batch = list(islice(records, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _session():
+    """Session on an up-to-date schema — importers may run before the app ever started on this database."""
+    # Imported lazily so CLIs can load config.env before the engine is created
+    from database import WriteSessionLocal
+    from migrations import prepare_database
+
+    prepare_database()
+    return WriteSessionLocal()
+
+
+def write_records(records, batch_size=BATCH_SIZE, incremental=True, db=None):
+    """
+    Upsert records in batches, one transaction per batch. With `incremental`, days whose
+    values match the import ledger are skipped. Returns (inserted, updated, skipped, failed).
+    Uses `db` when given (the caller has prepared the schema), otherwise its own session.
+    """
+    from journal_service import upsert_account_days
+    from importers import ledger
+
+    inserted = updated = skipped = failed = 0
+    known = {}
+    loaded_accounts = set()
+    own_session = db is None
+    if own_session:
+        db = _session()
+    try:
+        for batch in _batches(records, batch_size):
+            new_accounts = {rec["account_name"] for rec in batch} - loaded_accounts
+            if new_accounts:
+                known.update(ledger.load_day_hashes(db, new_accounts))
+                loaded_accounts |= new_accounts
+
+            hashes, changed = {}, []
+            for rec in batch:
+                key = (rec["account_name"], rec["date"])
+                h = ledger.day_hash(rec)
+                if incremental and known.get(key) == h:
+                    skipped += 1
+                    continue
+                hashes[key] = h
+                changed.append(rec)
+            if not changed:
+                continue
+
+            try:
+                ins, upd = upsert_account_days(db, changed)
+                ledger.record_days(db, hashes, known)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                print(f"Failed batch starting {changed[0]['date']}: {e}")
+                failed += len(changed)
+                continue
+            known.update(hashes)
+            inserted += ins
+            updated += upd
+    finally:
+        if own_session:
+            db.close()
+    return inserted, updated, skipped, failed
+
+
+def run_import(fmt, path, account=None, batch_size=BATCH_SIZE, force=False, **options):
+    """
+    Parse `path` with the `fmt` parser and write it to the journal.
+    Unchanged files and days are skipped unless `force`. Returns (inserted, updated, skipped).
+    """
+    from importers import ledger
+
+    if fmt not in PARSERS:
+        raise ValueError(f"Unknown format '{fmt}'. Available: {', '.join(sorted(PARSERS))}")
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} not found")
+
+    parser = PARSERS[fmt]
+    account = account or parser.default_account
+    if not account:
+        raise ValueError(f"Format '{fmt}' needs an account name")
+
+    file_hash = ledger.file_sha256(path)
+    db = _session()
+    try:
+        source = ledger.get_source(db, fmt, account, path)
+        if not force and source is not None and source.file_hash == file_hash:
+            print(f"{path} unchanged since last import (up to {source.watermark}), skipping.")
+            return 0, 0, 0
+        db.commit()
+
+        seen = {"watermark": None}
+
+        def tracked(records):
+            for rec in records:
+                if seen["watermark"] is None or rec["date"] > seen["watermark"]:
+                    seen["watermark"] = rec["date"]
+                yield rec
+
+        inserted, updated, skipped, failed = write_records(
+            tracked(parser(path, account, **options)), batch_size, incremental=not force, db=db
+        )
+        if failed:
+            # Leave the file unrecorded so the next run retries it
+            return inserted, updated, skipped
+
+        if parser.trades:
+            from trades import replace_trades
+            replace_trades(db, account, fmt, list(parser.trades(path)))
+        ledger.record_source(db, fmt, account, path, file_hash, seen["watermark"])
+        db.commit()
+    finally:
+        db.close()
+    return inserted, updated, skipped
@@ -0,0 +1,61 @@
+"""
+Groww trade-level P&L CSV (Scrip Name, Quantity, Buy Date, Buy Price, Buy Value,
+Sell Date, Sell Price, Sell Value, Realized P&L). Trades are attributed to their sell date.
+The CSV carries no per-trade charges, so report totals can be spread over the days:
+brokerage by trade count, taxes by turnover. Every round trip is also kept in the trades table.
+"""
+import csv
+from datetime import datetime
+
+from importers.base import register
+
+NON_TRADE_ROWS = {"Scrip Name", "Total", "Summary", "Realised P&L", "Charges", "Futures", "Options"}
+
+
+def iter_trades(path):
+    """Stream round trips out of the CSV as trade rows (see trades.replace_trades)."""
+    with open(path, mode="r", encoding="utf-8", newline="") as f:
+        for row in csv.reader(f):
+            if len(row) < 9 or row[0] in NON_TRADE_ROWS:
+                continue
+            if not row[4] or not row[5] or not row[7] or not row[8]:
+                continue
+            try:
+                yield {
+                    "date": datetime.strptime(row[5], "%d %b %Y").date(),
+                    "symbol": row[0].strip(),
+                    "quantity": int(float(row[1] or 0)),
+                    "buy_value": float(row[4]),
+                    "sell_value": float(row[7]),
+                    "pnl": float(row[8]),
+                }
+            except ValueError:
+                continue
+
+
+def daily_totals(path):
+    """{date: {"pnl", "turnover", "trades"}} aggregated while streaming the CSV."""
+    daily = {}
+    for trade in iter_trades(path):
+        totals = daily.setdefault(trade["date"], {"pnl": 0.0, "turnover": 0.0, "trades": 0})
+        totals["pnl"] += trade["pnl"]
+        totals["turnover"] += trade["buy_value"] + trade["sell_value"]
+        totals["trades"] += 1
+    return daily
+
+
+@register("groww-csv", trades=iter_trades)
+def parse(path, account, total_brokerage=0.0, total_taxes=0.0):
+    daily = daily_totals(path)
+    total_trades = sum(d["trades"] for d in daily.values())
+    total_turnover = sum(d["turnover"] for d in daily.values())
+
+    for day in sorted(daily):
+        d = daily[day]
+        brokerage = d["trades"] / total_trades * total_brokerage if total_trades else 0.0
+        taxes = d["turnover"] / total_turnover * total_taxes if total_turnover else 0.0
+        yield {
+            "date": day, "account_name": account,
+            "pnl": round(d["pnl"], 2), "brokerage": round(brokerage, 2), "taxes": round(taxes, 2),
+            "turnover": round(d["turnover"], 2), "order_count": d["trades"] * 2,  # a buy and a sell per trade
+        }
@@ -0,0 +1,32 @@
+"""Groww F&O report JSON with a dailyRealisedPnLHeatmap ({"2025-09-05": {"grossPnl": ...}})."""
+from datetime import datetime
+
+from importers import _json
+from importers.base import register
+
+HEATMAP_PREFIXES = [
+    "success.response.dailyRealisedPnLHeatmap",
+    "response.dailyRealisedPnLHeatmap",
+    "dailyRealisedPnLHeatmap",
+]
+
+
+@register("groww-heatmap")
+def parse(path, account):
+    for prefix in HEATMAP_PREFIXES:
+        found = False
+        for date_str, details in _json.kvitems(path, prefix):
+            found = True
+            if not isinstance(details, dict):
+                continue
+            yield {
+                "date": datetime.strptime(date_str, "%Y-%m-%d").date(),
+                "account_name": account,
+                "pnl": float(details.get("grossPnl", 0.0)),
+                "brokerage": float(details.get("brokerage", 0.0)),
+                "taxes": float(details.get("charges", 0.0)),  # Groww's 'charges' excludes brokerage
+                "order_count": int(details["totalOrders"]) if details.get("totalOrders") is not None else None,
+            }
+        if found:
+            return
+    print(f"Could not find 'dailyRealisedPnLHeatmap' in {path}.")
@@ -0,0 +1,70 @@
+"""
+Import ledger — makes re-imports incremental.
+
+A file whose hash matches the last import for the same (format, account, path)
+is skipped outright. Otherwise each parsed day is hashed and only days whose
+hash differs from the last imported one are written. Manual journal edits
+drop the ledger rows for that date and clear the file hash of every source
+covering it (journal_service.forget_imported_days), so a later import of the
+same file re-reads it and restores the broker's numbers.
+"""
+import hashlib
+import os
+from datetime import datetime
+
+from db_models import ImportSource, ImportedDay
+
+HASH_CHUNK = 1 << 20
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def day_hash(rec):
+    # Rounded to paise so float noise between parses never counts as a change
+    values = f'{rec["pnl"]:.2f}|{rec.get("brokerage", 0.0):.2f}|{rec.get("taxes", 0.0):.2f}'
+    for optional in ("turnover", "order_count"):
+        if rec.get(optional) is not None:
+            values += f'|{optional}={rec[optional]:.2f}'
+    return hashlib.sha1(values.encode()).hexdigest()
+
+
+def get_source(db, fmt, account, path):
+    return db.query(ImportSource).filter_by(
+        fmt=fmt, account_name=account, source_path=os.path.abspath(path)
+    ).first()
+
+
+def record_source(db, fmt, account, path, file_hash, watermark):
+    source = get_source(db, fmt, account, path)
+    if source is None:
+        source = ImportSource(fmt=fmt, account_name=account, source_path=os.path.abspath(path))
+        db.add(source)
+    source.file_hash = file_hash
+    source.watermark = watermark
+    source.imported_at = datetime.utcnow()
+
+
+def load_day_hashes(db, accounts):
+    """{(account, date): content_hash} for the given accounts."""
+    rows = db.query(ImportedDay.account_name, ImportedDay.date, ImportedDay.content_hash).filter(
+        ImportedDay.account_name.in_(list(accounts))
+    )
+    return {(account, day): h for account, day, h in rows}
+
+
+def record_days(db, hashes, known):
+    """Store {(account, date): content_hash} for days just written; `known` is what load_day_hashes returned."""
+    updates, inserts = [], []
+    for (account, day), h in hashes.items():
+        row = {"account_name": account, "date": day, "content_hash": h}
+        (updates if (account, day) in known else inserts).append(row)
+    if updates:
+        db.bulk_update_mappings(ImportedDay, updates)
+    if inserts:
+        db.bulk_insert_mappings(ImportedDay, inserts)
@@ -0,0 +1,46 @@
+"""Zerodha Console PnL JSON: segment dict ({"FO": {"2024-09-24": 0.0}}) or a list of daily rows."""
+from datetime import datetime
+
+from importers import _json
+from importers.base import register
+
+
+def _parse_date(value):
+    return datetime.strptime(str(value)[:10], "%Y-%m-%d").date()
+
+
+def parse_rows(rows, account):
+    """Daily rows as returned by the Console PnL report (date, realized/pnl, charges...)."""
+    for row in rows:
+        if not isinstance(row, dict) or not row.get("date"):
+            continue
+        try:
+            day = _parse_date(row["date"])
+        except ValueError:
+            continue
+        pnl = float(row.get("realized", row.get("pnl", 0)))
+        charges = float(row.get("charges", 0)) + float(row.get("other_charges", 0)) + float(row.get("taxes", 0))
+        yield {"date": day, "account_name": account, "pnl": pnl, "brokerage": charges, "taxes": 0.0}
+
+
+@register("zerodha-json", default_account="KITE")
+def parse(path, account):
+    found = False
+    for segment, dates in _json.kvitems(path, "data.result"):
+        if not isinstance(dates, dict):
+            continue
+        found = True
+        for date_str, pnl in dates.items():
+            yield {"date": _parse_date(date_str), "account_name": account,
+                   "pnl": float(pnl), "brokerage": 0.0, "taxes": 0.0}
+    if found:
+        return
+
+    # List format: data.result[] or a bare top-level list
+    rows = _json.items(path, "data.result")
+    first = next(rows, None)
+    if first is None:
+        rows = _json.items(path, "")
+    else:
+        yield from parse_rows([first], account)
+    yield from parse_rows(rows, account)
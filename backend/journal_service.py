@@ -0,0 +1,174 @@
+"""
+Journal Service — write-side helpers shared by the API routes and maintenance scripts.
+Keeps the daily_summary rollup in sync with journal_entries and tracks the journal version.
+"""
+from sqlalchemy import func, insert, literal, select, update
+from db_models import JournalEntry, DailySummary, JournalVersion, ImportedDay, ImportSource
+
+ALL_ACCOUNTS = "ALL"
+JOURNAL_VERSION_QUERY = select(JournalVersion.version).where(JournalVersion.id == 1)
+
+
+def _rollup_selects(dates=None):
+    """INSERT ... SELECT sources for the per-account rows and the combined ALL rows."""
+    brokerage = func.coalesce(JournalEntry.brokerage, 0.0)
+    taxes = func.coalesce(JournalEntry.taxes, 0.0)
+    pnl = func.coalesce(JournalEntry.pnl, 0.0)
+
+    def build(account_col, group_by):
+        stmt = select(
+            JournalEntry.date,
+            account_col,
+            func.sum(pnl),
+            func.sum(brokerage),
+            func.sum(taxes),
+            func.sum(pnl - brokerage - taxes),
+            func.count(JournalEntry.id),
+        ).where(JournalEntry.date.isnot(None))
+        if dates is not None:
+            stmt = stmt.where(JournalEntry.date.in_(dates))
+        return stmt.group_by(*group_by)
+
+    per_account = build(JournalEntry.account_name, [JournalEntry.date, JournalEntry.account_name])
+    combined = build(literal(ALL_ACCOUNTS), [JournalEntry.date])
+    return per_account, combined
+
+
+def _insert_rollups(db, dates=None):
+    columns = ["date", "account_name", "gross_pnl", "brokerage", "taxes", "net_pnl", "entry_count"]
+    for source in _rollup_selects(dates):
+        db.execute(insert(DailySummary).from_select(columns, source))
+
+
+def refresh_daily_summary(db, dates):
+    """
+    Recompute daily_summary rows for the given dates from journal_entries.
+    Runs inside the caller's transaction — the caller commits.
+    """
+    dates = list(set(dates))
+    if not dates:
+        return
+    db.flush()
+    db.query(DailySummary).filter(DailySummary.date.in_(dates)).delete(synchronize_session=False)
+    _insert_rollups(db, dates)
+
+
+def rebuild_daily_summary(db):
+    """Drop and recompute the whole daily_summary table."""
+    db.flush()
+    db.query(DailySummary).delete(synchronize_session=False)
+    _insert_rollups(db)
+
+
+def ensure_daily_summary(db):
+    """Backfill daily_summary once for databases created before the rollup existed."""
+    if db.query(DailySummary.id).first() is not None:
+        return False
+    if db.query(JournalEntry.id).first() is None:
+        return False
+    rebuild_daily_summary(db)
+    db.commit()
+    return True
+
+
+def get_journal_version(db):
+    """Current journal version (0 if nothing was ever written)."""
+    return db.execute(JOURNAL_VERSION_QUERY).scalar() or 0
+
+
+def bump_journal_version(db):
+    """
+    Increment the journal version inside the caller's transaction.
+    Every write to journal_entries / twitter_logs / journal_images should call this before commit.
+    """
+    result = db.execute(
+        update(JournalVersion).where(JournalVersion.id == 1).values(version=JournalVersion.version + 1)
+    )
+    if result.rowcount == 0:
+        db.add(JournalVersion(id=1, version=1))
+        db.flush()
+
+
+UPSERT_CHUNK = 500
+
+
+def forget_imported_days(db, dates, accounts=None):
+    """
+    Drop import-ledger hashes for days edited outside the importers, so the next
+    import rewrites them instead of treating them as unchanged. Source files that
+    cover those days lose their file hash too, otherwise an unchanged file would be
+    skipped before its days are ever compared.
+    """
+    dates = list(dates)
+    if not dates:
+        return
+    query = db.query(ImportedDay).filter(ImportedDay.date.in_(dates))
+    sources = db.query(ImportSource).filter(
+        (ImportSource.watermark >= min(dates)) | ImportSource.watermark.is_(None)
+    )
+    if accounts is not None:
+        query = query.filter(ImportedDay.account_name.in_(list(accounts)))
+        sources = sources.filter(ImportSource.account_name.in_(list(accounts)))
+    query.delete(synchronize_session=False)
+    sources.update({ImportSource.file_hash: ""}, synchronize_session=False)
+
+
+def upsert_account_days(db, records):
+    """
+    Insert or update journal entries per (date, account) without touching other accounts,
+    twitter logs or images for those dates.
+    `records` are dicts with date (datetime.date), account_name, pnl, brokerage, taxes
+    and optionally turnover, order_count.
+    Runs inside the caller's transaction — the caller commits.
+    Returns (inserted, updated).
+    """
+    # Last record wins for duplicate (date, account) pairs
+    by_key = {}
+    for rec in records:
+        by_key[(rec["date"], rec["account_name"])] = rec
+    if not by_key:
+        return 0, 0
+
+    dates = sorted({d for d, _ in by_key})
+    existing = {}
+    day_context = {}  # date -> (notes, image_path) so new account rows match the rest of the day
+    for i in range(0, len(dates), UPSERT_CHUNK):
+        chunk = dates[i:i + UPSERT_CHUNK]
+        rows = db.query(
+            JournalEntry.id, JournalEntry.date, JournalEntry.account_name,
+            JournalEntry.notes, JournalEntry.image_path,
+        ).filter(JournalEntry.date.in_(chunk)).all()
+        for row_id, row_date, account_name, notes, image_path in rows:
+            existing[(row_date, account_name)] = row_id
+            if row_date not in day_context or (notes and not day_context[row_date][0]):
+                day_context[row_date] = (notes, image_path)
+
+    inserts, updates = [], []
+    for (rec_date, account_name), rec in by_key.items():
+        values = {
+            "pnl": rec["pnl"],
+            "brokerage": rec.get("brokerage", 0.0),
+            "taxes": rec.get("taxes", 0.0),
+        }
+        # Only some sources report these; don't wipe them when a later import doesn't
+        for optional in ("turnover", "order_count"):
+            if rec.get(optional) is not None:
+                values[optional] = rec[optional]
+        row_id = existing.get((rec_date, account_name))
+        if row_id is not None:
+            updates.append({"id": row_id, **values})
+        else:
+            notes, image_path = day_context.get(rec_date, (None, None))
+            inserts.append({
+                "date": rec_date, "account_name": account_name,
+                "notes": notes, "image_path": image_path, **values,
+            })
+
+    if updates:
+        db.bulk_update_mappings(JournalEntry, updates)
+    if inserts:
+        db.bulk_insert_mappings(JournalEntry, inserts)
+
+    refresh_daily_summary(db, dates)
+    bump_journal_version(db)
+    return len(inserts), len(updates)
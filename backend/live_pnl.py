@@ -0,0 +1,334 @@
+"""
+Live PnL — one background poller per deployment, fanned out to every subscriber.
+
+Every worker runs `run_worker_loop()`. Workers compete for a lease row in
+live_pnl_state; only the lease holder calls the brokers, and only while some
+worker has subscribers. The snapshot is written to the same row, and each
+worker pushes new snapshots to its own SSE subscribers. Broker load therefore
+stays constant no matter how many dashboards / workers are open.
+
+During market hours the leader also polls without subscribers so every
+snapshot lands in pnl_snapshots (see pnl_snapshots.py) for the intraday curve.
+"""
+import asyncio
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+
+import pnl_snapshots
+from database import SessionLocal, WriteSessionLocal
+from db_models import LivePnlState
+
+STATE_KEY = "live"
+POLL_INTERVAL = float(os.getenv('LIVE_PNL_INTERVAL', '15'))
+# Leader must renew within this window or another worker takes over
+LEASE_SECONDS = max(30.0, POLL_INTERVAL * 3)
+LEASE_RENEW_SECONDS = LEASE_SECONDS / 3
+# Subscribers must be seen this recently for the leader to keep polling brokers
+DEMAND_WINDOW = 30.0
+# How often each worker checks the shared row for a new snapshot
+TICK_SECONDS = 1.0
+HEARTBEAT_SECONDS = 15.0
+# How often the leader compacts finished days in pnl_snapshots
+DOWNSAMPLE_SECONDS = 3600.0
+
+# On-demand fetches (/fetch_live_pnl) reuse any snapshot younger than this
+FETCH_CACHE_TTL = float(os.getenv('LIVE_PNL_CACHE_TTL', '5'))
+FETCH_LEASE_KEY = "fetch"
+FETCH_POLL_SECONDS = 0.25
+
+_worker_ids = {}  # pid -> id; keyed by pid so forked workers (gunicorn --preload) never share one
+
+_subscribers = set()  # asyncio.Queue per connected client in this worker
+_subscriber_joined = asyncio.Event()  # wakes the loop to mark demand when the first client connects
+_fetch_lock = threading.Lock()
+_last_downsample = 0.0
+
+
+# ─── Shared state (sync, run in the thread pool) ────────────────────
+
+def _worker_id():
+    pid = os.getpid()
+    if pid not in _worker_ids:
+        _worker_ids[pid] = f"{socket.gethostname()}:{pid}:{uuid.uuid4().hex[:8]}"
+    return _worker_ids[pid]
+
+
+def _read_state(key=STATE_KEY):
+    """The state row from a read-only session (never takes the SQLite write lock)."""
+    db = SessionLocal()
+    try:
+        return db.get(LivePnlState, key)
+    finally:
+        db.close()
+
+
+def _load_state(key=STATE_KEY):
+    """_read_state, creating the row first if this is a fresh database."""
+    state = _read_state(key)
+    if state is None:
+        db = WriteSessionLocal()
+        try:
+            _ensure_state(db, key)
+        finally:
+            db.close()
+        state = _read_state(key)
+    return state
+
+
+def _snapshot_of(state):
+    if state is None or not state.payload:
+        return 0.0, None
+    return state.fetched_at, json.loads(state.payload)
+
+
+def _ensure_state(db, key=STATE_KEY):
+    if db.get(LivePnlState, key) is None:
+        try:
+            db.add(LivePnlState(key=key, fetched_at=0.0, lease_expires_at=0.0, demand_at=0.0))
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+
+
+def _acquire_lease(db, now, key=STATE_KEY, seconds=LEASE_SECONDS):
+    """Take or renew the lease on `key`. Returns True if this worker now holds it."""
+    result = db.execute(
+        update(LivePnlState)
+        .where(LivePnlState.key == key)
+        .where(or_(
+            LivePnlState.lease_owner == _worker_id(),
+            LivePnlState.lease_owner.is_(None),
+            LivePnlState.lease_expires_at < now,
+        ))
+        .values(lease_owner=_worker_id(), lease_expires_at=now + seconds)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def _release_lease(db, key):
+    db.execute(
+        update(LivePnlState)
+        .where(LivePnlState.key == key, LivePnlState.lease_owner == _worker_id())
+        .values(lease_owner=None, lease_expires_at=0.0)
+    )
+    db.commit()
+
+
+def _mark_demand(db, now):
+    db.execute(update(LivePnlState).where(LivePnlState.key == STATE_KEY).values(demand_at=now))
+    db.commit()
+
+
+def fetch_snapshot():
+    """Call every broker once and return the snapshot payload."""
+    from broker_service import fetch_all_accounts
+
+    accounts, errors = fetch_all_accounts()
+    return {
+        "date": datetime.now().strftime("%Y-%m-%d"),
+        "accounts": accounts,
+        "errors": errors,
+        "fetched_at": time.time(),
+    }
+
+
+def store_snapshot(db, snapshot):
+    db.execute(
+        update(LivePnlState)
+        .where(LivePnlState.key == STATE_KEY)
+        .values(payload=json.dumps(snapshot), fetched_at=snapshot["fetched_at"])
+    )
+    pnl_snapshots.record_snapshot(db, snapshot)
+    db.commit()
+
+
+def _tick(has_subscribers, mark_demand):
+    """
+    One pass of the worker loop. Returns (fetched_at, payload) of the latest snapshot.
+    Everything is decided from a read-only look at the state row; a write transaction
+    is only opened to mark demand or when this worker has leader work to do.
+    """
+    global _last_downsample
+    now = time.time()
+    state = _load_state()
+    me = _worker_id()
+
+    demand_at = now if has_subscribers and mark_demand else (state.demand_at or 0.0)
+    fetched_at = state.fetched_at or 0.0
+    wanted = now - demand_at < DEMAND_WINDOW
+    fetch = (wanted and now - fetched_at >= POLL_INTERVAL) or pnl_snapshots.capture_due(now, fetched_at)
+    compact = now - _last_downsample >= DOWNSAMPLE_SECONDS
+
+    expires_at = state.lease_expires_at or 0.0
+    holder = state.lease_owner == me and expires_at >= now
+    available = holder or state.lease_owner is None or expires_at < now
+    # Keep leadership sticky while there is (or soon will be) polling to do
+    renew = (
+        holder
+        and (wanted or pnl_snapshots.market_open(now))
+        and expires_at - now <= LEASE_SECONDS - LEASE_RENEW_SECONDS
+    )
+    lead = available and (fetch or compact or renew)
+
+    if not (lead or (has_subscribers and mark_demand)):
+        return _snapshot_of(state)
+
+    db = WriteSessionLocal()
+    try:
+        if has_subscribers and mark_demand:
+            _mark_demand(db, now)
+        if lead and _acquire_lease(db, now):
+            # _acquire_lease committed, so the broker calls run without the write lock
+            if fetch:
+                snapshot = fetch_snapshot()
+                store_snapshot(db, snapshot)
+            if compact:
+                _last_downsample = now
+                pnl_snapshots.downsample(db, now)
+    finally:
+        db.close()
+    return _snapshot_of(_read_state())
+
+
+def get_live_pnl():
+    """
+    Single-flight live PnL for /fetch_live_pnl (called from the thread pool).
+    Returns a snapshot no older than FETCH_CACHE_TTL. Concurrent callers in this
+    worker queue on a lock; callers in other workers wait on the shared "fetch"
+    lease. Either way a burst produces one set of broker calls. Waiting is done
+    with read-only sessions; a write session is only opened to take the lease.
+    """
+    from broker_service import BROKER_FETCH_TIMEOUT
+
+    def fresh(snapshot):
+        fetched_at, payload = snapshot
+        return payload if payload and time.time() - fetched_at <= FETCH_CACHE_TTL else None
+
+    def fetch_and_store(db):
+        snapshot = fetch_snapshot()
+        store_snapshot(db, snapshot)
+        return snapshot
+
+    lease_seconds = BROKER_FETCH_TIMEOUT + 5
+    with _fetch_lock:
+        deadline = time.time() + lease_seconds
+        while time.time() < deadline:
+            payload = fresh(_snapshot_of(_load_state()))
+            if payload:
+                return payload
+
+            lease = _load_state(FETCH_LEASE_KEY)
+            now = time.time()
+            if lease.lease_owner is None or (lease.lease_expires_at or 0.0) < now:
+                db = WriteSessionLocal()
+                try:
+                    if _acquire_lease(db, now, FETCH_LEASE_KEY, lease_seconds):
+                        try:
+                            # The previous holder may have stored a snapshot just before releasing
+                            payload = fresh(_snapshot_of(_read_state()))
+                            return payload or fetch_and_store(db)
+                        finally:
+                            _release_lease(db, FETCH_LEASE_KEY)
+                finally:
+                    db.close()
+
+            # Another worker is fetching — wait for its snapshot to land
+            time.sleep(FETCH_POLL_SECONDS)
+
+        # The other fetcher never delivered; don't leave the caller empty-handed
+        db = WriteSessionLocal()
+        try:
+            return fetch_and_store(db)
+        finally:
+            db.close()
+
+
+# ─── Worker loop and fan-out ────────────────────────────────────────
+
+def _broadcast(payload):
+    for queue in list(_subscribers):
+        if queue.full():
+            # Slow client — drop its stale snapshot, it only needs the latest
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        queue.put_nowait(payload)
+
+
+async def run_worker_loop():
+    """Background task started once per worker process."""
+    last_sent = None
+    last_demand_mark = 0.0
+    while True:
+        try:
+            if last_sent is None:
+                # Clients get the current snapshot from subscribe() — only broadcast newer ones
+                last_sent, _ = await run_in_threadpool(_read_latest)
+            if _subscriber_joined.is_set():
+                _subscriber_joined.clear()
+                last_demand_mark = 0.0
+            now = time.time()
+            mark_demand = now - last_demand_mark >= DEMAND_WINDOW / 3
+            tick = asyncio.ensure_future(run_in_threadpool(_tick, bool(_subscribers), mark_demand))
+            try:
+                fetched_at, payload = await asyncio.shield(tick)
+            except asyncio.CancelledError:
+                # Shutting down: the thread can't be interrupted, so let its transaction
+                # finish before the lifespan disposes the engines
+                await asyncio.wait([tick])
+                raise
+            if _subscribers and mark_demand:
+                last_demand_mark = now
+            if payload and fetched_at > last_sent:
+                last_sent = fetched_at
+                _broadcast(payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Live PnL loop error: {e}")
+        try:
+            await asyncio.wait_for(_subscriber_joined.wait(), TICK_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def subscribe():
+    """
+    Async generator of Server-Sent Events for one client: the latest snapshot
+    right away, then every new one, with periodic heartbeats.
+    """
+    queue = asyncio.Queue(maxsize=1)
+    if not _subscribers:
+        _subscriber_joined.set()
+    _subscribers.add(queue)
+    try:
+        sent_at, latest = await run_in_threadpool(_read_latest)
+        if latest:
+            yield f"data: {json.dumps(latest)}\n\n"
+        while True:
+            try:
+                payload = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+                # A broadcast can race the initial read above — don't send the same snapshot twice
+                if payload["fetched_at"] <= sent_at:
+                    continue
+                sent_at = payload["fetched_at"]
+                yield f"data: {json.dumps(payload)}\n\n"
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+    finally:
+        _subscribers.discard(queue)
+
+
+def _read_latest():
+    return _snapshot_of(_read_state())
@@ -1,16 +1,42 @@
 from dotenv import load_dotenv
 load_dotenv('config.env')
 
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from database import engine
-import db_models
 from routers import journal
-
-# Create Tables
-db_models.Base.metadata.create_all(bind=engine)
-
-app = FastAPI(title="Trading Journal API")
+from migrations import prepare_database
+
+# Create tables, upgrade the schema and backfill the daily rollup — one worker at a time
+try:
+    prepare_database()
+except Exception as e:
+    # Don't serve from a half-upgraded database
+    print(f"Database preparation failed, not starting: {e}")
+    raise
+
+@asynccontextmanager
+async def lifespan(app):
+    # Per-worker loop: competes for the live PnL poller lease and fans snapshots out to SSE clients
+    from live_pnl import run_worker_loop
+    live_task = asyncio.create_task(run_worker_loop())
+    yield
+    live_task.cancel()
+    try:
+        # Returns once an in-flight tick has finished its transaction (see run_worker_loop)
+        await live_task
+    except asyncio.CancelledError:
+        pass
+    from database import async_engine
+    if async_engine is not None:
+        await async_engine.dispose()
+
+app = FastAPI(title="Trading Journal API", lifespan=lifespan)
+
+# Bound upload request size before the body is spooled (added first so CORS wraps its errors)
+from upload_storage import UploadSizeLimit
+app.add_middleware(UploadSizeLimit)
 
 # Configure CORS
 app.add_middleware(
@@ -23,13 +49,13 @@ app.add_middleware(
 
 app.include_router(journal.router)
 
-from fastapi.staticfiles import StaticFiles
+from upload_storage import ImmutableStaticFiles, UPLOAD_DIR
 import os
 
-if not os.path.exists("uploads"):
-    os.makedirs("uploads")
+if not os.path.exists(UPLOAD_DIR):
+    os.makedirs(UPLOAD_DIR)
 
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+app.mount("/uploads", ImmutableStaticFiles(directory=UPLOAD_DIR), name="uploads")
 
 @app.get("/")
 def root():
@@ -0,0 +1,185 @@
+"""
+Market Context — NIFTY 50 / SENSEX open, close and change for journal days.
+
+The market_context table is a persistent cache in front of a pluggable index
+data provider: a day is fetched once, days the provider has nothing for are
+stored as status=no_data (negative cache), and provider failures are returned
+as status=error without being cached so they are retried. Range requests fetch
+every missing day with a single provider call.
+"""
+import csv
+import os
+from datetime import date, datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from db_models import MarketContext
+
+INDICES = {
+    "NIFTY 50": "nifty",
+    "SENSEX": "sensex",
+}
+MAX_RANGE_DAYS = 366
+
+# A no_data row stored within this many days of its date may still be backfilled
+# by the provider (e.g. a late file update), so it is retried after NO_DATA_RETRY
+NO_DATA_SETTLE_DAYS = 3
+NO_DATA_RETRY = timedelta(hours=6)
+
+
+# ─── Providers ──────────────────────────────────────────────────────
+
+class FileProvider:
+    """
+    Reads index data from a local CSV (MARKET_DATA_FILE, default backend/market_data.csv):
+    date,index,open,close[,prev_close] with date as YYYY-MM-DD and index as 'NIFTY 50' /
+    'SENSEX' — see market_data.example.csv. Change is taken against prev_close when given,
+    otherwise against the previous row's close for that index.
+
+    A missing file means no data, so days are cached as no_data; after adding the file,
+    delete those market_context rows to have them fetched again.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv(
+            'MARKET_DATA_FILE',
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), 'market_data.csv')
+        )
+
+    def fetch(self, start, end):
+        if not os.path.exists(self.path):
+            return {}
+
+        rows = []
+        with open(self.path, newline="") as f:
+            for row in csv.DictReader(f):
+                rows.append((datetime.strptime(row["date"], "%Y-%m-%d").date(), row))
+        rows.sort(key=lambda r: r[0])
+
+        result = {}
+        last_close = {}
+        for day, row in rows:
+            name = row["index"].strip()
+            close = float(row["close"])
+            prev_close = float(row["prev_close"]) if row.get("prev_close") else last_close.get(name)
+            last_close[name] = close
+            if not (start <= day <= end) or name not in INDICES:
+                continue
+            open_ = float(row["open"])
+            base = prev_close if prev_close else open_
+            result.setdefault(day, {})[name] = {
+                "open": open_,
+                "close": close,
+                "change": round(close - base, 2),
+                "change_pct": round((close - base) / base * 100, 2) if base else 0.0,
+            }
+        return result
+
+
+# name -> factory; MARKET_DATA_PROVIDER picks one
+PROVIDERS = {
+    "file": FileProvider,
+}
+
+
+def get_provider():
+    name = os.getenv('MARKET_DATA_PROVIDER', 'file')
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown market data provider '{name}'")
+    return PROVIDERS[name]()
+
+
+# ─── Cache ──────────────────────────────────────────────────────────
+
+def _serialize(row):
+    if row.status != "ok":
+        return {name: {"status": row.status} for name in INDICES}
+    result = {}
+    for name, prefix in INDICES.items():
+        close = getattr(row, f"{prefix}_close")
+        if close is None:
+            result[name] = {"status": "no_data"}
+            continue
+        result[name] = {
+            "status": "ok",
+            "open": getattr(row, f"{prefix}_open"),
+            "close": close,
+            "change": getattr(row, f"{prefix}_change"),
+            "change_pct": getattr(row, f"{prefix}_change_pct"),
+        }
+    return result
+
+
+def _is_fresh(row, now):
+    if row.status == "ok":
+        return True
+    if row.status == "no_data":
+        created = row.created_at or now
+        settled = created.date() - row.date >= timedelta(days=NO_DATA_SETTLE_DAYS)
+        return settled or now - created < NO_DATA_RETRY
+    return False
+
+
+def _apply(row, day_data):
+    row.status = "ok" if day_data else "no_data"
+    for name, prefix in INDICES.items():
+        values = (day_data or {}).get(name, {})
+        setattr(row, f"{prefix}_open", values.get("open"))
+        setattr(row, f"{prefix}_close", values.get("close"))
+        setattr(row, f"{prefix}_change", values.get("change"))
+        setattr(row, f"{prefix}_change_pct", values.get("change_pct"))
+    row.created_at = datetime.utcnow()
+
+
+def get_market_context(db, start, end, provider=None):
+    """{date: {"NIFTY 50": {...}, "SENSEX": {...}}} for every calendar day in [start, end]."""
+    if end < start:
+        raise ValueError("end must not be before start")
+    if (end - start).days >= MAX_RANGE_DAYS:
+        raise ValueError(f"Range too large (max {MAX_RANGE_DAYS} days)")
+
+    now = datetime.utcnow()
+    today = date.today()
+    cached = {
+        row.date: row
+        for row in db.query(MarketContext).filter(MarketContext.date >= start, MarketContext.date <= end)
+    }
+
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    missing = [d for d in days if d not in cached or not _is_fresh(cached[d], now)]
+
+    result = {}
+    if missing:
+        try:
+            fetched = (provider or get_provider()).fetch(missing[0], missing[-1])
+        except Exception as e:
+            print(f"Market data provider failed: {e}")
+            fetched = None
+
+        for d in missing:
+            if fetched is None:
+                result[d] = {name: {"status": "error"} for name in INDICES}
+                continue
+            if d >= today and d not in fetched:
+                # Today's / future data may still arrive; don't cache the gap
+                result[d] = {name: {"status": "no_data"} for name in INDICES}
+                continue
+            row = cached.get(d)
+            if row is None:
+                row = MarketContext(date=d)
+                db.add(row)
+                cached[d] = row
+            _apply(row, fetched.get(d))
+
+    for d in days:
+        if d not in result:
+            result[d] = _serialize(cached[d])
+
+    if missing:
+        try:
+            db.commit()
+        except (IntegrityError, OperationalError):
+            # A concurrent request cached the same days first (or holds the write lock);
+            # the cache is best effort and our answer is just as good
+            db.rollback()
+    return {d.isoformat(): result[d] for d in days}
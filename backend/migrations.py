@@ -0,0 +1,178 @@
+"""
+Migrations — lightweight in-place schema upgrades for existing databases.
+create_all() only creates missing tables; columns and indexes added to existing models land here.
+"""
+import hashlib
+import os
+import tempfile
+from contextlib import contextmanager
+
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+try:
+    import fcntl
+except ImportError:  # Windows — no cross-process lock; BEGIN IMMEDIATE still serialises SQLite
+    fcntl = None
+
+# table -> [(column, DDL type)]
+ADDED_COLUMNS = {
+    "journal_entries": [
+        ("turnover", "FLOAT"),
+        ("order_count", "INTEGER"),
+    ],
+    "journal_images": [
+        ("thumb_path", "VARCHAR"),
+        ("medium_path", "VARCHAR"),
+    ],
+}
+
+# Rows dropped by _dedupe_journal_entries are copied here first
+DEDUPE_BACKUP_TABLE = "journal_entries_dedupe_backup"
+
+# Single-column indexes superseded by the composite / covering ones on the models
+DROPPED_INDEXES = [
+    "ix_journal_entries_date",
+    "ix_journal_entries_account_name",
+    "ix_twitter_logs_date",
+    "ix_journal_images_date",
+    "ix_daily_summary_date",
+    "ix_daily_summary_account_name",
+]
+
+
+def _add_missing_columns(conn):
+    inspector = inspect(conn)
+    tables = set(inspector.get_table_names())
+    for table, columns in ADDED_COLUMNS.items():
+        if table not in tables:
+            continue
+        existing = {c["name"] for c in inspector.get_columns(table)}
+        for column, ddl_type in columns:
+            if column not in existing:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"))
+
+
+def _dedupe_journal_entries(conn):
+    """
+    Keep the newest row per (date, account) so the unique index can be built.
+    The older rows are copied to DEDUPE_BACKUP_TABLE before they are deleted.
+    """
+    dupes = conn.execute(text(
+        "SELECT date, account_name FROM journal_entries "
+        "GROUP BY date, account_name HAVING COUNT(*) > 1"
+    )).fetchall()
+    if not dupes:
+        return
+
+    losers = "SELECT {columns} FROM journal_entries WHERE id NOT IN " \
+             "(SELECT MAX(id) FROM journal_entries GROUP BY date, account_name)"
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {DEDUPE_BACKUP_TABLE} AS SELECT * FROM journal_entries WHERE 1 = 0"
+    ))
+    # Only columns both tables have: the backup may predate columns added since
+    inspector = inspect(conn)
+    backup_columns = {c["name"] for c in inspector.get_columns(DEDUPE_BACKUP_TABLE)}
+    columns = ", ".join(
+        c["name"] for c in inspector.get_columns("journal_entries") if c["name"] in backup_columns
+    )
+    backed_up = conn.execute(text(
+        f"INSERT INTO {DEDUPE_BACKUP_TABLE} ({columns}) " + losers.format(columns=columns)
+    )).rowcount
+    conn.execute(text(
+        "DELETE FROM journal_entries WHERE id NOT IN "
+        "(SELECT MAX(id) FROM journal_entries GROUP BY date, account_name)"
+    ))
+    from journal_service import refresh_daily_summary, bump_journal_version
+
+    session = Session(bind=conn)
+    # An empty rollup is rebuilt in full at startup (ensure_daily_summary) — don't pre-empt that
+    if "daily_summary" in inspector.get_table_names() and \
+            conn.execute(text("SELECT 1 FROM daily_summary LIMIT 1")).first():
+        refresh_daily_summary(session, sorted({d for d, _ in dupes}))
+    # Clients holding the old ETag would otherwise keep the removed rows
+    if "journal_version" in inspector.get_table_names():
+        bump_journal_version(session)
+    session.flush()
+    print(f"Removed {backed_up} duplicate journal entries for {len(dupes)} (date, account) pairs; "
+          f"the removed rows are kept in {DEDUPE_BACKUP_TABLE}.")
+
+
+def _sync_indexes(conn):
+    """Drop superseded indexes, then create every model index that is missing."""
+    from database import Base
+
+    for name in DROPPED_INDEXES:
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+    tables = set(inspect(conn).get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+
+def upgrade_schema(engine):
+    """Bring an existing database up to the current models. Safe to run on every startup."""
+    with engine.begin() as conn:
+        _add_missing_columns(conn)
+        if "journal_entries" in inspect(conn).get_table_names():
+            _dedupe_journal_entries(conn)
+        _sync_indexes(conn)
+
+
+@contextmanager
+def _schema_lock():
+    """Exclusive lock shared by every process on the same database (gunicorn workers, CLIs)."""
+    from database import SQLALCHEMY_DATABASE_URL
+
+    if fcntl is None:
+        yield
+        return
+    key = hashlib.sha1(SQLALCHEMY_DATABASE_URL.encode()).hexdigest()[:12]
+    path = os.path.join(tempfile.gettempdir(), f"trading_journal-schema-{key}.lock")
+    with open(path, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _create_tables(engine):
+    from database import Base
+
+    try:
+        Base.metadata.create_all(bind=engine)
+    except DBAPIError as e:
+        # Another host (no shared lock file) created it between the check and the CREATE
+        if "already exists" not in str(e) and "duplicate key" not in str(e):
+            raise
+        Base.metadata.create_all(bind=engine)
+
+
+def prepare_database(backfill_summary=True):
+    """
+    Create missing tables, upgrade the schema and backfill the daily rollup, one process at a
+    time and on BEGIN IMMEDIATE transactions — workers starting together would otherwise race
+    each other's DDL into "database is locked". Run before serving or importing.
+    """
+    import db_models  # noqa: F401 — registers the models on Base
+    from database import write_engine, WriteSessionLocal
+    from journal_service import ensure_daily_summary
+
+    with _schema_lock():
+        _create_tables(write_engine)
+        upgrade_schema(write_engine)
+        if not backfill_summary:
+            return
+        db = WriteSessionLocal()
+        try:
+            ensure_daily_summary(db)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
@@ -48,3 +48,27 @@ class JournalEntryResponse(JournalEntryBase):
     
     class Config:
         from_attributes = True
+
+# Bulk multi-day upsert (importers)
+class BulkUpsertRecord(BaseModel):
+    date: str # YYYY-MM-DD
+    account_name: str
+    pnl: float
+    brokerage: float = 0.0
+    taxes: float = 0.0
+
+class BulkUpsertRequest(BaseModel):
+    records: List[BulkUpsertRecord]
+
+# Period-level cost distribution (see cost_distribution.py)
+class CostPeriod(BaseModel):
+    start_date: Optional[str] = None # YYYY-MM-DD, open-ended if omitted
+    end_date: Optional[str] = None
+    brokerage: float = 0.0
+    taxes: float = 0.0
+
+class CostDistributionRequest(BaseModel):
+    account_name: str = "KITE"
+    weighting: str = "equal" # equal | turnover | order_count
+    dry_run: bool = False
+    periods: List[CostPeriod]
@@ -0,0 +1,109 @@
+"""
+PnL Snapshots — intraday MTM time series per account.
+
+Every live snapshot (poller or on-demand fetch) is appended as raw rows. Once a
+day is over its raw rows are compacted to 1-minute buckets, and after
+PNL_SNAPSHOT_5M_AFTER_DAYS to 5-minute buckets (last MTM in each bucket), so a
+day captured every few seconds ends up as a few hundred rows per account.
+"""
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, delete, func, insert, literal, select
+
+from db_models import PnlSnapshot
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+RAW = 0
+MINUTE = 60
+FIVE_MINUTES = 300
+
+# Capture while the F&O market is open (IST, Mon-Fri), every N seconds; 0 disables it
+CAPTURE_INTERVAL = float(os.getenv('PNL_CAPTURE_INTERVAL', '15'))
+MARKET_OPEN = (9, 15)
+MARKET_CLOSE = (15, 30)
+FIVE_MINUTE_AFTER_DAYS = int(os.getenv('PNL_SNAPSHOT_5M_AFTER_DAYS', '7'))
+
+
+def market_open(now=None):
+    local = datetime.fromtimestamp(now if now is not None else time.time(), IST)
+    if local.weekday() >= 5:
+        return False
+    return MARKET_OPEN <= (local.hour, local.minute) <= MARKET_CLOSE
+
+
+def capture_due(now, last_fetched_at):
+    return (
+        CAPTURE_INTERVAL > 0
+        and market_open(now)
+        and now - last_fetched_at >= CAPTURE_INTERVAL
+    )
+
+
+def _day_start(now=None, days_ago=0):
+    local = datetime.fromtimestamp(now if now is not None else time.time(), IST)
+    start = local.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days_ago)
+    return int(start.timestamp())
+
+
+def record_snapshot(db, snapshot):
+    """Append one raw row per account from a live snapshot. The caller commits."""
+    ts = int(snapshot["fetched_at"])
+    for acc in snapshot.get("accounts", []):
+        # merge: a poll and an on-demand fetch can land in the same second
+        db.merge(PnlSnapshot(account_name=acc["account_name"], ts=ts, resolution=RAW, m2m=acc["pnl"]))
+
+
+def _compact(db, from_resolution, to_resolution, before_ts):
+    """Replace rows of `from_resolution` older than `before_ts` with last-value buckets."""
+    bucket = (PnlSnapshot.ts // to_resolution) * to_resolution
+    ranked = (
+        select(
+            PnlSnapshot.account_name,
+            bucket.label("bucket"),
+            PnlSnapshot.m2m,
+            func.row_number().over(
+                partition_by=(PnlSnapshot.account_name, bucket),
+                order_by=PnlSnapshot.ts.desc(),
+            ).label("rn"),
+        )
+        .where(PnlSnapshot.resolution == from_resolution, PnlSnapshot.ts < before_ts)
+        .subquery()
+    )
+    last_per_bucket = select(
+        ranked.c.account_name, ranked.c.bucket, literal(to_resolution), ranked.c.m2m
+    ).where(ranked.c.rn == 1)
+
+    db.execute(
+        insert(PnlSnapshot).from_select(["account_name", "ts", "resolution", "m2m"], last_per_bucket)
+    )
+    db.execute(
+        delete(PnlSnapshot).where(and_(
+            PnlSnapshot.resolution == from_resolution, PnlSnapshot.ts < before_ts
+        ))
+    )
+
+
+def downsample(db, now=None):
+    """Compact finished days: raw -> 1 min, and 1 min -> 5 min after FIVE_MINUTE_AFTER_DAYS."""
+    _compact(db, RAW, MINUTE, _day_start(now))
+    _compact(db, MINUTE, FIVE_MINUTES, _day_start(now, FIVE_MINUTE_AFTER_DAYS))
+    db.commit()
+
+
+def query_range(db, start_ts, end_ts, account=None):
+    """{account: {"ts": [...], "m2m": [...]}} for start_ts <= ts <= end_ts, oldest first."""
+    query = db.query(PnlSnapshot.account_name, PnlSnapshot.ts, PnlSnapshot.m2m).filter(
+        PnlSnapshot.ts >= start_ts, PnlSnapshot.ts <= end_ts
+    )
+    if account:
+        query = query.filter(PnlSnapshot.account_name == account)
+
+    series = {}
+    for account_name, ts, m2m in query.order_by(PnlSnapshot.account_name, PnlSnapshot.ts):
+        s = series.setdefault(account_name, {"ts": [], "m2m": []})
+        s["ts"].append(ts)
+        s["m2m"].append(m2m)
+    return series
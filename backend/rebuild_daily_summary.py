@@ -0,0 +1,28 @@
+from dotenv import load_dotenv
+load_dotenv('config.env')
+
+from database import WriteSessionLocal
+from db_models import DailySummary
+from journal_service import rebuild_daily_summary, bump_journal_version
+from migrations import prepare_database
+
+
+def run_rebuild():
+    # The rollup is rebuilt below — skip the startup backfill
+    prepare_database(backfill_summary=False)
+
+    db = WriteSessionLocal()
+    try:
+        rebuild_daily_summary(db)
+        bump_journal_version(db)
+        db.commit()
+        rows = db.query(DailySummary).count()
+        print(f"Done. daily_summary rebuilt with {rows} rows.")
+    except Exception as e:
+        db.rollback()
+        print(f"Rebuild failed: {e}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    run_rebuild()
@@ -1,34 +1,77 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Request, Response, Query
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
+from sqlalchemy import func, case, select, or_, and_
 from typing import List, Dict
-import shutil
-import os
-from database import get_db
-from db_models import JournalEntry, TwitterLog, JournalImage
-from models import JournalEntryCreate, JournalEntryResponse, DailyLogCreate
+from collections import OrderedDict
+import json
+import threading
+from database import get_db, get_write_db, read_all
+from upload_storage import store_upload
+from image_derivatives import queue_derivatives, existing_derivatives
+from db_models import JournalEntry, TwitterLog, JournalImage, DailySummary
+from journal_service import ALL_ACCOUNTS, JOURNAL_VERSION_QUERY, refresh_daily_summary, bump_journal_version, get_journal_version, upsert_account_days, forget_imported_days
+from models import JournalEntryCreate, JournalEntryResponse, DailyLogCreate, BulkUpsertRequest, CostDistributionRequest
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 router = APIRouter(
     prefix="/journal",
     tags=["journal"],
     responses={404: {"description": "Not found"}},
 )
 
-UPLOAD_DIR = "uploads"
+COLUMNAR_MEDIA_TYPE = "application/vnd.journal.columnar+json"
+
+def _parse_date(value: str):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format")
+
+async def _journal_etag_async(variant: str = ""):
+    """
+    Weak ETag derived from the journal version — any write invalidates every cached response.
+    Read before the data, so the data is never older than the tag.
+    """
+    (rows,) = await read_all(JOURNAL_VERSION_QUERY)
+    version = rows[0][0] if rows else 0
+    return f'W/"j{version or 0}{variant}"'
+
+def _check_not_modified(request: Request, response: Response, etag: str):
+    """
+    Return a 304 Response if the client's If-None-Match already matches, otherwise
+    tag the outgoing response so the browser revalidates next time.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [t.strip() for t in if_none_match.split(",")]
+        if "*" in tags or etag in tags:
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    return None
 
 @router.post("/upload_images")
 async def upload_images(files: List[UploadFile] = File(...)):
-    """Upload multiple images and return their paths."""
+    """Upload multiple images and return their content-addressed paths."""
     file_paths = []
     for file in files:
-        file_path = os.path.join(UPLOAD_DIR, file.filename)
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        file_paths.append(file_path)
+        try:
+            path = await store_upload(file)
+        finally:
+            await file.close()
+        queue_derivatives(path)
+        file_paths.append(path)
     return {"file_paths": file_paths}
 
 @router.post("/daily_log")
-def create_daily_log(log: DailyLogCreate, db: Session = Depends(get_db)):
+def create_daily_log(log: DailyLogCreate, db: Session = Depends(get_write_db)):
     try:
         log_date = datetime.strptime(log.date, "%Y-%m-%d").date()
     except ValueError:
@@ -39,8 +82,9 @@ def create_daily_log(log: DailyLogCreate, db: Session = Depends(get_db)):
     db.query(TwitterLog).filter(TwitterLog.date == log_date).delete()
     db.query(JournalImage).filter(JournalImage.date == log_date).delete()
     
-    # Create Journal Entries
-    for acc in log.accounts:
+    # Create Journal Entries (one per account — the last one wins if an account is repeated)
+    accounts = {acc.account_name: acc for acc in log.accounts}
+    for acc in accounts.values():
         entry = JournalEntry(
             date=log_date,
             account_name=acc.account_name,
@@ -65,14 +109,74 @@ def create_daily_log(log: DailyLogCreate, db: Session = Depends(get_db)):
     # Save Images
     if hasattr(log, 'image_paths') and log.image_paths:
         for path in log.image_paths:
-            img = JournalImage(date=log_date, image_path=path)
+            derivatives = existing_derivatives(path)
+            img = JournalImage(
+                date=log_date,
+                image_path=path,
+                thumb_path=derivatives["thumb"],
+                medium_path=derivatives["medium"]
+            )
             db.add(img)
-        
+
+    refresh_daily_summary(db, [log_date])
+    forget_imported_days(db, [log_date])
+    bump_journal_version(db)
     db.commit()
     return {"status": "success", "message": "Daily log saved"}
 
+@router.post("/bulk_upsert")
+def bulk_upsert(payload: BulkUpsertRequest, db: Session = Depends(get_write_db)):
+    """
+    Upsert many (date, account) rows in one transaction.
+    Only the named accounts are written — other accounts, notes, twitter logs and images stay untouched.
+    """
+    records = []
+    for rec in payload.records:
+        try:
+            rec_date = datetime.strptime(rec.date, "%Y-%m-%d").date()
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid date format: {rec.date}")
+        records.append({
+            "date": rec_date,
+            "account_name": rec.account_name,
+            "pnl": rec.pnl,
+            "brokerage": rec.brokerage,
+            "taxes": rec.taxes
+        })
+
+    inserted, updated = upsert_account_days(db, records)
+    dates_by_account = {}
+    for rec in records:
+        dates_by_account.setdefault(rec["account_name"], set()).add(rec["date"])
+    for account_name, dates in dates_by_account.items():
+        forget_imported_days(db, dates, [account_name])
+    db.commit()
+    return {"status": "success", "inserted": inserted, "updated": updated}
+
+@router.post("/distribute_costs")
+def distribute_costs(payload: CostDistributionRequest, db: Session = Depends(get_write_db)):
+    """
+    Spread period-level brokerage / taxes over one account's days (default KITE).
+    Only that account's rows change. Use dry_run to preview the per-day split.
+    """
+    from cost_distribution import distribute_costs as run_distribution
+
+    periods = [
+        {
+            "start_date": _parse_date(p.start_date) if p.start_date else None,
+            "end_date": _parse_date(p.end_date) if p.end_date else None,
+            "brokerage": p.brokerage,
+            "taxes": p.taxes,
+        }
+        for p in payload.periods
+    ]
+    try:
+        return run_distribution(db, payload.account_name, periods, payload.weighting, payload.dry_run)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.delete("/daily_log/{date}")
-def delete_daily_log(date: str, db: Session = Depends(get_db)):
+def delete_daily_log(date: str, db: Session = Depends(get_write_db)):
     """Delete all journal entries, twitter logs, and images for a specific date."""
     try:
         log_date = datetime.strptime(date, "%Y-%m-%d").date()
@@ -85,28 +189,37 @@ def delete_daily_log(date: str, db: Session = Depends(get_db)):
     
     if entries_deleted == 0 and twitter_deleted == 0 and images_deleted == 0:
         raise HTTPException(status_code=404, detail="No entries found for this date")
-    
+
+    refresh_daily_summary(db, [log_date])
+    forget_imported_days(db, [log_date])
+    bump_journal_version(db)
     db.commit()
     return {"status": "success", "message": f"Deleted logs for {date}"}
 
 @router.get("/daily_log/{date}")
-def get_daily_log(date: str, db: Session = Depends(get_db)):
+async def get_daily_log(date: str, request: Request, response: Response):
     """Get all journal entries for a specific date (for editing)."""
-    try:
-        log_date = datetime.strptime(date, "%Y-%m-%d").date()
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid date format")
-    
-    entries = db.query(JournalEntry).filter(JournalEntry.date == log_date).all()
-    twitter_logs = db.query(TwitterLog).filter(TwitterLog.date == log_date).all()
-    images = db.query(JournalImage).filter(JournalImage.date == log_date).all()
+    log_date = _parse_date(date)
+
+    not_modified = _check_not_modified(request, response, await _journal_etag_async())
+    if not_modified:
+        return not_modified
+
+    entries, twitter_logs, images = await read_all(
+        select(
+            JournalEntry.account_name, JournalEntry.pnl, JournalEntry.brokerage,
+            JournalEntry.taxes, JournalEntry.notes,
+        ).where(JournalEntry.date == log_date).order_by(JournalEntry.id),
+        select(TwitterLog.twitter_handle, TwitterLog.pnl).where(TwitterLog.date == log_date).order_by(TwitterLog.id),
+        select(JournalImage.image_path).where(JournalImage.date == log_date).order_by(JournalImage.id),
+    )
     
     if not entries:
         raise HTTPException(status_code=404, detail="No entries found for this date")
     
     return {
         "date": date,
-        "notes": entries[0].notes if entries else None,
+        "notes": entries[0].notes,
         "image_paths": [img.image_path for img in images],
         "accounts": [
             {
@@ -121,36 +234,55 @@ def get_daily_log(date: str, db: Session = Depends(get_db)):
         ]
     }
 
-@router.get("/entries", response_model=List[JournalEntryResponse])
-def get_entries(
-    start_date: str = None, 
-    end_date: str = None, 
-    account: str = None, 
-    db: Session = Depends(get_db)
-):
-    query = db.query(JournalEntry)
-    
-    if start_date:
-        s_date = datetime.strptime(start_date, "%Y-%m-%d").date()
-        query = query.filter(JournalEntry.date >= s_date)
-    if end_date:
-        e_date = datetime.strptime(end_date, "%Y-%m-%d").date()
-        query = query.filter(JournalEntry.date <= e_date)
-    if account:
-        query = query.filter(JournalEntry.account_name == account)
-        
-    entries = query.order_by(JournalEntry.date.desc()).all()
-    
-    # Fetch Twitter Logs for relevant dates
-    unique_dates = {e.date for e in entries}
-    
-    twitter_logs_query = db.query(TwitterLog).filter(TwitterLog.date.in_(unique_dates))
-    twitter_logs = twitter_logs_query.all()
-    
-    # Fetch Images for relevant dates
-    images_query = db.query(JournalImage).filter(JournalImage.date.in_(unique_dates))
-    images = images_query.all()
+def _dumps(payload):
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+def _wants_columnar(request: Request, fmt: str):
+    if fmt:
+        return fmt == "columnar"
+    return COLUMNAR_MEDIA_TYPE in request.headers.get("accept", "")
 
+def _columnar_entries(rows):
+    """
+    Parallel arrays instead of one dict per row; account names are dictionary-encoded.
+    Skips ORM hydration and per-row pydantic validation entirely.
+    """
+    accounts = []
+    account_index = {}
+    ids, dates, account_ids, pnl, brokerage, taxes = [], [], [], [], [], []
+    for row_id, row_date, account_name, row_pnl, row_brokerage, row_taxes in rows:
+        idx = account_index.get(account_name)
+        if idx is None:
+            idx = account_index[account_name] = len(accounts)
+            accounts.append(account_name)
+        ids.append(row_id)
+        dates.append(row_date.isoformat())
+        account_ids.append(idx)
+        pnl.append(row_pnl)
+        brokerage.append(row_brokerage)
+        taxes.append(row_taxes)
+
+    return {
+        "format": "columnar",
+        "length": len(ids),
+        "accounts": accounts,
+        "columns": {
+            "id": ids,
+            "date": dates,
+            "account": account_ids,
+            "pnl": pnl,
+            "brokerage": brokerage,
+            "taxes": taxes,
+        },
+    }
+
+def _nested_entries(entries, twitter_logs, images):
+    """
+    Serialized JournalEntryResponse list with each day's twitter logs and images attached.
+    Built and encoded in a worker thread — for the full history that's too long to hold the event loop.
+    """
     # Map logs to dates
     logs_by_date = {} # {date: [log_schema]}
     for tw in twitter_logs:
@@ -177,53 +309,432 @@ def get_entries(
             "taxes": e.taxes,
             "notes": e.notes,
             "image_path": e.image_path,
-            "created_at": e.created_at,
+            "created_at": e.created_at.isoformat() if e.created_at else None,
             "twitter_logs": logs_by_date.get(e.date, []),
             "image_paths": images_by_date.get(e.date, [])
         }
         results.append(entry_dict)
         
-    return results
+    return _dumps(results)
 
-@router.get("/stats")
-def get_stats(db: Session = Depends(get_db)):
-    entries = db.query(JournalEntry).all()
-    
-    total_pnl = sum(e.pnl for e in entries)
-    total_trades = len(entries)
-    
-    # Simple winrate (Note: this is raw entries winrate, daily winrate is more complex if multiple accounts)
-    # The user asked for "Win % (overall days where the combined PnL was +ve )"
-    # We need to aggregate by date first for that specific stat.
-    
-    daily_pnl = {}
+@router.get("/entries", response_model=List[JournalEntryResponse])
+async def get_entries(
+    request: Request,
+    response: Response,
+    start_date: str = None, 
+    end_date: str = None, 
+    account: str = None, 
+    fmt: str = Query(None, alias="format"),
+):
+    columnar = _wants_columnar(request, fmt)
+    response.headers["Vary"] = "Accept"
+    not_modified = _check_not_modified(request, response, await _journal_etag_async("c" if columnar else ""))
+    if not_modified:
+        return not_modified
+
+    # Twitter logs and images are filtered by the same date range rather than an
+    # IN list of the entries' dates, so all three queries can run at once
+    def in_range(model):
+        conditions = []
+        if start_date:
+            conditions.append(model.date >= _parse_date(start_date))
+        if end_date:
+            conditions.append(model.date <= _parse_date(end_date))
+        return conditions
+
+    conditions = in_range(JournalEntry)
+    if account:
+        conditions.append(JournalEntry.account_name == account)
+
+    if columnar:
+        (rows,) = await read_all(
+            select(
+                JournalEntry.id,
+                JournalEntry.date,
+                JournalEntry.account_name,
+                JournalEntry.pnl,
+                JournalEntry.brokerage,
+                JournalEntry.taxes,
+            ).where(*conditions).order_by(JournalEntry.date.desc())
+        )
+        content = await run_in_threadpool(lambda: _dumps(_columnar_entries(rows)))
+        return Response(content=content, media_type="application/json", headers=dict(response.headers))
+
+    entries, twitter_logs, images = await read_all(
+        select(
+            JournalEntry.id, JournalEntry.date, JournalEntry.account_name, JournalEntry.pnl,
+            JournalEntry.brokerage, JournalEntry.taxes, JournalEntry.notes,
+            JournalEntry.image_path, JournalEntry.created_at,
+        ).where(*conditions).order_by(JournalEntry.date.desc()),
+        select(TwitterLog.date, TwitterLog.twitter_handle, TwitterLog.pnl)
+        .where(*in_range(TwitterLog)).order_by(TwitterLog.id),
+        select(JournalImage.date, JournalImage.image_path)
+        .where(*in_range(JournalImage)).order_by(JournalImage.id),
+    )
+
+    content = await run_in_threadpool(_nested_entries, entries, twitter_logs, images)
+    return Response(content=content, media_type="application/json", headers=dict(response.headers))
+
+FEED_PAGE_MAX = 100
+
+def _parse_feed_cursor(cursor: str):
+    """Cursor format: '<YYYY-MM-DD>:<daily_summary id>' of the last day on the previous page."""
+    try:
+        date_part, id_part = cursor.split(":", 1)
+        return datetime.strptime(date_part, "%Y-%m-%d").date(), int(id_part)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _feed_image(img: JournalImage, image_size: str):
+    """`src` is the smallest variant that satisfies image_size (thumb < medium < full), falling back to the original."""
+    if image_size == "full":
+        src = img.image_path
+    elif image_size == "medium":
+        src = img.medium_path or img.image_path
+    else:
+        src = img.thumb_path or img.medium_path or img.image_path
+    return {"src": src, "full": img.image_path, "thumb": img.thumb_path, "medium": img.medium_path}
+
+@router.get("/feed")
+def get_feed(
+    cursor: str = None,
+    limit: int = 20,
+    image_size: str = "thumb",
+    start_date: str = None,
+    end_date: str = None,
+    account: str = None,
+    db: Session = Depends(get_db)
+):
+    """One object per date (newest first) with nested accounts, keyset-paginated on (date, id)."""
+    limit = max(1, min(limit, FEED_PAGE_MAX))
+
+    # Page over daily_summary: exactly one row per date for a given account filter
+    days_query = db.query(DailySummary).filter(DailySummary.account_name == (account or ALL_ACCOUNTS))
+    if start_date:
+        days_query = days_query.filter(DailySummary.date >= _parse_date(start_date))
+    if end_date:
+        days_query = days_query.filter(DailySummary.date <= _parse_date(end_date))
+    if cursor:
+        c_date, c_id = _parse_feed_cursor(cursor)
+        days_query = days_query.filter(or_(
+            DailySummary.date < c_date,
+            and_(DailySummary.date == c_date, DailySummary.id < c_id),
+        ))
+
+    days = days_query.order_by(DailySummary.date.desc(), DailySummary.id.desc()).limit(limit + 1).all()
+    has_more = len(days) > limit
+    days = days[:limit]
+    if not days:
+        return {"items": [], "next_cursor": None}
+
+    page_dates = [d.date for d in days]
+
+    entries_query = db.query(JournalEntry).filter(JournalEntry.date.in_(page_dates))
+    if account:
+        entries_query = entries_query.filter(JournalEntry.account_name == account)
+    entries = entries_query.order_by(JournalEntry.id).all()
+    twitter_logs = db.query(TwitterLog).filter(TwitterLog.date.in_(page_dates)).all()
+    images = db.query(JournalImage).filter(JournalImage.date.in_(page_dates)).all()
+
+    entries_by_date = {}
     for e in entries:
-        if e.date not in daily_pnl: daily_pnl[e.date] = 0
-        daily_pnl[e.date] += e.pnl
-        
-    winning_days = len([p for p in daily_pnl.values() if p > 0])
-    total_days = len(daily_pnl)
+        entries_by_date.setdefault(e.date, []).append(e)
+    logs_by_date = {}
+    for tw in twitter_logs:
+        logs_by_date.setdefault(tw.date, []).append({"twitter_handle": tw.twitter_handle, "pnl": tw.pnl})
+    images_by_date = {}
+    for img in images:
+        images_by_date.setdefault(img.date, []).append(img)
+
+    items = []
+    for day in days:
+        day_entries = entries_by_date.get(day.date, [])
+        notes = next((e.notes for e in day_entries if e.notes), None)
+        image_path = next((e.image_path for e in day_entries if e.image_path), None)
+        items.append({
+            "date": day.date.isoformat(),
+            "total_pnl": day.gross_pnl,
+            "total_brokerage": day.brokerage,
+            "total_taxes": day.taxes,
+            "net_pnl": day.net_pnl,
+            "notes": notes,
+            "image_path": image_path,
+            "image_paths": [img.image_path for img in images_by_date.get(day.date, [])],
+            "images": [_feed_image(img, image_size) for img in images_by_date.get(day.date, [])],
+            "twitter_logs": logs_by_date.get(day.date, []),
+            "accounts": [
+                {
+                    "id": e.id,
+                    "account_name": e.account_name,
+                    "pnl": e.pnl,
+                    "brokerage": e.brokerage,
+                    "taxes": e.taxes
+                } for e in day_entries
+            ]
+        })
+
+    last = days[-1]
+    return {
+        "items": items,
+        "next_cursor": f"{last.date.isoformat()}:{last.id}" if has_more else None
+    }
+
+@router.get("/stats")
+async def get_stats(request: Request, response: Response):
+    not_modified = _check_not_modified(request, response, await _journal_etag_async())
+    if not_modified:
+        return not_modified
+
+    # Read the pre-aggregated ALL rows (one per day) instead of every entry.
+    # Win % is "overall days where the combined PnL was +ve".
+    totals, breakdown = await read_all(
+        select(
+            func.coalesce(func.sum(DailySummary.gross_pnl), 0.0),
+            func.coalesce(func.sum(DailySummary.entry_count), 0),
+            func.count(DailySummary.id),
+            func.coalesce(func.sum(case((DailySummary.gross_pnl > 0, 1), else_=0)), 0),
+        ).where(DailySummary.account_name == ALL_ACCOUNTS),
+        _account_breakdown_query(),
+    )
+    total_pnl, total_trades, total_days, winning_days = totals[0]
+
     win_rate = (winning_days / total_days * 100) if total_days > 0 else 0
     
     return {
         "total_pnl": total_pnl,
         "win_rate": win_rate,
         "total_days_logged": total_days,
-        "account_breakdown": {} # Placeholder if needed
+        "account_breakdown": _account_breakdown(breakdown)
     }
 
+def _account_breakdown_query():
+    """Per-account totals, winning days and max drawdown in one GROUP BY over daily_summary."""
+    # Running equity per account (window functions work on SQLite >= 3.25 and Postgres)
+    equity = func.sum(DailySummary.gross_pnl).over(
+        partition_by=DailySummary.account_name,
+        order_by=DailySummary.date,
+        rows=(None, 0),
+    )
+    running = (
+        select(DailySummary, equity.label("equity"))
+        .where(DailySummary.account_name != ALL_ACCOUNTS)
+        .subquery()
+    )
+    peak = func.max(running.c.equity).over(
+        partition_by=running.c.account_name,
+        order_by=running.c.date,
+        rows=(None, 0),
+    )
+    curve = select(running, peak.label("peak")).subquery()
+
+    # Equity starts at 0, so the peak never counts below 0
+    drawdown = curve.c.equity - case((curve.c.peak > 0, curve.c.peak), else_=0.0)
+
+    return select(
+        curve.c.account_name,
+        func.sum(curve.c.gross_pnl),
+        func.sum(curve.c.brokerage),
+        func.sum(curve.c.taxes),
+        func.sum(curve.c.net_pnl),
+        func.sum(case((curve.c.gross_pnl > 0, 1), else_=0)),
+        func.count(),
+        func.min(drawdown),
+    ).group_by(curve.c.account_name).order_by(curve.c.account_name)
+
+def _account_breakdown(rows):
+    return {
+        account: {
+            "gross_pnl": gross,
+            "brokerage": brokerage,
+            "taxes": taxes,
+            "net_pnl": net,
+            "winning_days": winning_days,
+            "total_days": total_days,
+            "win_rate": (winning_days / total_days * 100) if total_days > 0 else 0,
+            "max_drawdown": min(max_dd, 0.0),
+        }
+        for account, gross, brokerage, taxes, net, winning_days, total_days, max_dd in rows
+    }
+
+@router.get("/analytics")
+def get_analytics(
+    start_date: str = None,
+    end_date: str = None,
+    account: str = None,
+    db: Session = Depends(get_db)
+):
+    """Equity curve, drawdown and win/loss stats (gross and net), aggregated per day."""
+    from analytics import compute_analytics
+
+    query = db.query(
+        DailySummary.date,
+        DailySummary.gross_pnl,
+        DailySummary.brokerage,
+        DailySummary.taxes,
+        DailySummary.entry_count,
+    ).filter(DailySummary.account_name == (account or ALL_ACCOUNTS))
+
+    if start_date:
+        query = query.filter(DailySummary.date >= _parse_date(start_date))
+    if end_date:
+        query = query.filter(DailySummary.date <= _parse_date(end_date))
+
+    daily = query.order_by(DailySummary.date).all()
+
+    result = compute_analytics(daily)
+    result["filters"] = {"start_date": start_date, "end_date": end_date, "account": account}
+    return result
+
+
+CALENDAR_CACHE_SIZE = 32
+_calendar_cache = OrderedDict()  # (journal version, filters) -> payload
+_calendar_cache_lock = threading.Lock()  # sync route: hit from several threadpool workers
+
+@router.get("/calendar")
+def get_calendar(
+    request: Request,
+    response: Response,
+    start_date: str = None,
+    end_date: str = None,
+    account: str = None,
+    basis: str = "gross",
+    db: Session = Depends(get_db)
+):
+    """
+    Calendar heatmap buckets — days, ISO weeks and months with gross/net PnL, win flag,
+    intensity (-1..1) and counts, plus daily/weekly/monthly win rates.
+    Cached per journal version, so repeat loads skip the aggregation entirely.
+    """
+    from analytics import compute_calendar
+
+    if basis not in ("gross", "net"):
+        raise HTTPException(status_code=400, detail="basis must be gross or net")
+    start = _parse_date(start_date) if start_date else None
+    end = _parse_date(end_date) if end_date else None
+
+    version = get_journal_version(db)
+    not_modified = _check_not_modified(request, response, f'W/"j{version}"')
+    if not_modified:
+        return not_modified
+
+    key = (version, account, start, end, basis)
+    with _calendar_cache_lock:
+        cached = _calendar_cache.get(key)
+        if cached is not None:
+            _calendar_cache.move_to_end(key)
+            return cached
+
+    query = db.query(
+        DailySummary.date,
+        DailySummary.gross_pnl,
+        DailySummary.brokerage,
+        DailySummary.taxes,
+        DailySummary.entry_count,
+    ).filter(DailySummary.account_name == (account or ALL_ACCOUNTS))
+    if start:
+        query = query.filter(DailySummary.date >= start)
+    if end:
+        query = query.filter(DailySummary.date <= end)
+
+    result = compute_calendar(query.order_by(DailySummary.date).all(), basis)
+    result["filters"] = {"start_date": start_date, "end_date": end_date, "account": account}
+
+    with _calendar_cache_lock:
+        _calendar_cache[key] = result
+        while len(_calendar_cache) > CALENDAR_CACHE_SIZE:
+            _calendar_cache.popitem(last=False)
+    return result
+
 
 @router.get("/fetch_live_pnl")
 def fetch_live_pnl():
-    """Fetch today's live PnL from all connected broker accounts (Zerodha + Groww)."""
-    from broker_service import fetch_all_accounts
-    
-    accounts, errors = fetch_all_accounts()
-    today = datetime.now().strftime("%Y-%m-%d")
-    
+    """
+    Fetch today's live PnL from all connected broker accounts (Zerodha + Groww).
+    Coalesced across requests and workers, with a few seconds of caching (live_pnl.get_live_pnl).
+    """
+    from live_pnl import get_live_pnl
+
+    snapshot = get_live_pnl()
     return {
-        "date": today,
-        "accounts": accounts,
-        "errors": errors
+        "date": snapshot["date"],
+        "accounts": snapshot["accounts"],
+        "errors": snapshot["errors"],
+        "fetched_at": snapshot["fetched_at"]
+    }
+
+@router.get("/live_pnl/stream")
+async def stream_live_pnl():
+    """
+    Server-Sent Events stream of live PnL snapshots. Snapshots come from the single
+    deployment-wide poller (live_pnl.py), so open dashboards don't add broker calls.
+    """
+    from live_pnl import subscribe
+
+    return StreamingResponse(
+        subscribe(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/pnl_snapshots")
+def get_pnl_snapshots(
+    start_date: str = None,
+    end_date: str = None,
+    account: str = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Intraday MTM curve per account between start_date and end_date (inclusive, IST days;
+    default today). Columnar: {"series": {account: {"ts": [...], "m2m": [...]}}}, ts in epoch seconds.
+    Recent days are at capture resolution, older days at 1 / 5 minute buckets.
+    """
+    import pnl_snapshots
+
+    start = _parse_date(start_date) if start_date else datetime.now(pnl_snapshots.IST).date()
+    end = _parse_date(end_date) if end_date else start
+    start_ts = int(datetime.combine(start, datetime.min.time(), pnl_snapshots.IST).timestamp())
+    end_ts = int(datetime.combine(end, datetime.max.time(), pnl_snapshots.IST).timestamp())
+
+    return {
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        "series": pnl_snapshots.query_range(db, start_ts, end_ts, account),
     }
 
+
+@router.get("/trades/pnl")
+def get_trade_pnl(
+    group_by: str = "underlying",
+    account: str = None,
+    underlying: str = None,
+    start_date: str = None,
+    end_date: str = None,
+    db: Session = Depends(get_db)
+):
+    """Realised P&L from the trades table per underlying (default) or per symbol, best first."""
+    from trades import GROUPINGS, trade_pnl
+
+    if group_by not in GROUPINGS:
+        raise HTTPException(status_code=400, detail=f"group_by must be one of: {', '.join(GROUPINGS)}")
+    start = _parse_date(start_date) if start_date else None
+    end = _parse_date(end_date) if end_date else None
+    return trade_pnl(db, group_by, account, underlying, start, end)
+
+
+@router.get("/market_context")
+def get_market_context_range(start: str, end: str, db: Session = Depends(get_db)):
+    """NIFTY 50 / SENSEX context for every day in [start, end] — one call fills a whole page of cards."""
+    from market_context import get_market_context
+
+    try:
+        return get_market_context(db, _parse_date(start), _parse_date(end))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/market_context/{date}")
+def get_market_context_day(date: str, db: Session = Depends(get_db)):
+    """NIFTY 50 / SENSEX open, close and change for one day ({"NIFTY 50": {status, open, close, change, change_pct}, "SENSEX": {...}})."""
+    from market_context import get_market_context
+
+    day = _parse_date(date)
+    return get_market_context(db, day, day)[day.isoformat()]
@@ -0,0 +1,144 @@
+"""
+Token Cache — broker access tokens shared by every worker process.
+Backed by a small SQLite file; a per-key file lock makes sure only one process
+re-authenticates when a token expires, the rest pick up the fresh token.
+
+Zerodha and Groww access tokens are both invalidated daily at 06:00 IST, so a
+token is trusted (no validation round trip) until the next 06:00 IST after it was issued.
+"""
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+try:
+    import fcntl
+except ImportError:  # Windows — fall back to in-process locking only
+    fcntl = None
+
+TOKEN_CACHE_PATH = os.getenv(
+    'TOKEN_CACHE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'broker_tokens.db')
+)
+
+IST = timezone(timedelta(hours=5, minutes=30))
+TOKEN_RESET_HOUR_IST = 6
+# Treat tokens as expired slightly early so an in-flight fetch never straddles the reset
+EXPIRY_MARGIN_SECONDS = 60
+
+_memory = {}  # key -> (token, expires_at) — skips the SQLite read on the hot path
+_thread_locks = {}  # key -> threading.Lock, so different accounts refresh in parallel
+_thread_locks_guard = threading.Lock()
+
+
+def next_token_expiry(issued_at=None):
+    """Epoch seconds of the next 06:00 IST after `issued_at` (epoch seconds, default now)."""
+    issued = datetime.fromtimestamp(issued_at if issued_at is not None else time.time(), IST)
+    reset = issued.replace(hour=TOKEN_RESET_HOUR_IST, minute=0, second=0, microsecond=0)
+    if reset <= issued:
+        reset += timedelta(days=1)
+    return reset.timestamp()
+
+
+def _connect():
+    conn = sqlite3.connect(TOKEN_CACHE_PATH, timeout=10)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS broker_tokens ("
+        "key TEXT PRIMARY KEY, token TEXT NOT NULL, expires_at REAL NOT NULL, updated_at REAL NOT NULL)"
+    )
+    return conn
+
+
+def _is_fresh(expires_at):
+    return expires_at - EXPIRY_MARGIN_SECONDS > time.time()
+
+
+def get_token(key):
+    """Return a cached token that is still within its lifetime, or None."""
+    cached = _memory.get(key)
+    if cached and _is_fresh(cached[1]):
+        return cached[0]
+
+    conn = _connect()
+    try:
+        row = conn.execute("SELECT token, expires_at FROM broker_tokens WHERE key = ?", (key,)).fetchone()
+    finally:
+        conn.close()
+
+    if row and _is_fresh(row[1]):
+        _memory[key] = (row[0], row[1])
+        return row[0]
+    return None
+
+
+def store_token(key, token, expires_at=None):
+    expires_at = expires_at if expires_at is not None else next_token_expiry()
+    conn = _connect()
+    try:
+        with conn:
+            conn.execute(
+                "INSERT INTO broker_tokens (key, token, expires_at, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET token = excluded.token, "
+                "expires_at = excluded.expires_at, updated_at = excluded.updated_at",
+                (key, token, expires_at, time.time())
+            )
+    finally:
+        conn.close()
+    _memory[key] = (token, expires_at)
+
+
+def invalidate(key, token=None):
+    """
+    Drop a token the broker rejected. Passing the rejected `token` avoids wiping
+    a newer one another worker stored in the meantime.
+    """
+    _memory.pop(key, None)
+    conn = _connect()
+    try:
+        with conn:
+            if token is None:
+                conn.execute("DELETE FROM broker_tokens WHERE key = ?", (key,))
+            else:
+                conn.execute("DELETE FROM broker_tokens WHERE key = ? AND token = ?", (key, token))
+    finally:
+        conn.close()
+
+
+@contextmanager
+def _refresh_lock(key):
+    """Cross-process exclusive lock for one key (plus a thread lock within this process)."""
+    with _thread_locks_guard:
+        thread_lock = _thread_locks.setdefault(key, threading.Lock())
+    with thread_lock:
+        if fcntl is None:
+            yield
+            return
+        safe_key = "".join(c if c.isalnum() else "_" for c in key)
+        with open(f"{TOKEN_CACHE_PATH}.{safe_key}.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def get_or_refresh(key, refresh):
+    """
+    Return a fresh token for `key`, calling `refresh()` at most once across all workers
+    when it is missing or expired. `refresh` returns (token, expires_at) or (None, None) on failure.
+    """
+    token = get_token(key)
+    if token:
+        return token
+
+    with _refresh_lock(key):
+        # Another worker may have refreshed while we waited for the lock
+        token = get_token(key)
+        if token:
+            return token
+        token, expires_at = refresh()
+        if token:
+            store_token(key, token, expires_at)
+        return token
@@ -0,0 +1,118 @@
+"""
+Trades — trade-level storage behind the daily journal rows, and P&L by instrument / underlying.
+Each source replaces its own rows per (account, date), so re-ingesting a day is idempotent.
+"""
+import re
+
+from sqlalchemy import func
+
+from db_models import Trade
+
+SOURCE_GROWW_CSV = "groww-csv"  # importer format name
+SOURCE_KITE = "kite"
+
+_UNDERLYING_RE = re.compile(r"[A-Z&\-]+")
+
+_kite_recorded = {}  # account -> order ids last stored, so live polls only write when fills change
+
+
+def underlying_of(symbol):
+    """NIFTY24O1725000CE -> NIFTY, 'BANKNIFTY 30 Oct 51000 Put' -> BANKNIFTY."""
+    match = _UNDERLYING_RE.match(symbol.strip().upper())
+    return match.group(0).rstrip("-") if match else symbol
+
+
+def replace_trades(db, account, source, rows):
+    """
+    Bulk-insert `rows` (dicts with date, symbol, quantity, buy_value, sell_value, pnl) after
+    deleting this source's earlier rows for the same account and dates. The caller commits.
+    """
+    dates = {row["date"] for row in rows}
+    if not dates:
+        return 0
+    db.query(Trade).filter(
+        Trade.account_name == account, Trade.source == source, Trade.date.in_(list(dates))
+    ).delete(synchronize_session=False)
+    db.bulk_insert_mappings(Trade, [
+        {
+            **row,
+            "account_name": account,
+            "source": source,
+            "underlying": row.get("underlying") or underlying_of(row["symbol"]),
+        }
+        for row in rows
+    ])
+    return len(rows)
+
+
+def record_kite_fills(account, orders):
+    """Store today's executed Kite orders as fills. Skips the write when nothing changed since the last poll."""
+    from database import WriteSessionLocal
+
+    order_ids = frozenset(o.get("order_id") for o in orders)
+    if not orders or _kite_recorded.get(account) == order_ids:
+        return
+    rows = [
+        {
+            "date": o["order_timestamp"].date(),
+            "symbol": o["tradingsymbol"],
+            "quantity": o["filled_quantity"],
+            "buy_value": o["filled_quantity"] * o["average_price"] if o["transaction_type"] == "BUY" else 0.0,
+            "sell_value": o["filled_quantity"] * o["average_price"] if o["transaction_type"] == "SELL" else 0.0,
+            "pnl": None,
+        }
+        for o in orders
+    ]
+    db = WriteSessionLocal()
+    try:
+        replace_trades(db, account, SOURCE_KITE, rows)
+        db.commit()
+        _kite_recorded[account] = order_ids
+    except Exception as e:
+        db.rollback()
+        print(f"Recording Kite fills failed: {e}")
+    finally:
+        db.close()
+
+
+GROUPINGS = {
+    "underlying": Trade.underlying,
+    "symbol": Trade.symbol,
+}
+
+
+def trade_pnl(db, group_by="underlying", account=None, underlying=None, start=None, end=None):
+    """
+    Realised P&L per underlying or symbol. Fills without a pnl (Kite) count as
+    sell value - buy value, which equals realised P&L once the position is flat.
+    """
+    key = GROUPINGS[group_by]
+    pnl = func.sum(func.coalesce(Trade.pnl, Trade.sell_value - Trade.buy_value))
+    query = db.query(
+        key.label("key"),
+        func.count(Trade.id),
+        func.sum(Trade.quantity),
+        func.sum(Trade.buy_value),
+        func.sum(Trade.sell_value),
+        pnl.label("pnl"),
+    )
+    if account:
+        query = query.filter(Trade.account_name == account)
+    if underlying:
+        query = query.filter(Trade.underlying == underlying)
+    if start:
+        query = query.filter(Trade.date >= start)
+    if end:
+        query = query.filter(Trade.date <= end)
+
+    return [
+        {
+            group_by: k,
+            "trades": trades,
+            "quantity": quantity or 0,
+            "buy_value": round(buy or 0.0, 2),
+            "sell_value": round(sell or 0.0, 2),
+            "pnl": round(total or 0.0, 2),
+        }
+        for k, trades, quantity, buy, sell, total in query.group_by(key).order_by(pnl.desc())
+    ]
@@ -0,0 +1,120 @@
+"""
+Uploads — content-addressed storage for journal screenshots.
+Files are streamed to disk in chunks off the event loop, stored as
+uploads/<aa>/<bb>/<sha256>.<ext> (identical files dedupe to one path)
+and served with immutable cache headers.
+"""
+import os
+import re
+import uuid
+import hashlib
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
+
+UPLOAD_DIR = "uploads"
+TMP_DIR = os.path.join(UPLOAD_DIR, "tmp")
+CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", "20")) * 1024 * 1024
+# Whole multipart request (several files); enforced on Content-Length before the body is read
+MAX_UPLOAD_REQUEST_BYTES = int(os.getenv("MAX_UPLOAD_REQUEST_MB", "100")) * 1024 * 1024
+UPLOAD_ROUTES = {"/journal/upload_images"}
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Matches the sharded layout relative to the mount: aa/bb/<64 hex>[_variant].<ext>
+HASHED_PATH_RE = re.compile(r"^[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}[\w.-]*$")
+
+
+def _extension(filename):
+    ext = os.path.splitext(filename or "")[1].lower()
+    return ext if re.fullmatch(r"\.[a-z0-9]{1,8}", ext) else ""
+
+
+def hashed_path(digest, ext):
+    """uploads/<aa>/<bb>/<digest><ext> — two shard levels keep directories small."""
+    return os.path.join(UPLOAD_DIR, digest[:2], digest[2:4], f"{digest}{ext}")
+
+
+def _finalize(tmp_path, final_path):
+    """Move the temp file into place, or drop it if identical content is already stored."""
+    if os.path.exists(final_path):
+        os.remove(tmp_path)
+        return
+    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+    os.replace(tmp_path, final_path)
+
+
+async def store_upload(file: UploadFile):
+    """
+    Stream an upload to disk without blocking the event loop.
+    Returns the content-addressed path; raises 413 if the file exceeds MAX_UPLOAD_BYTES.
+
+    MAX_UPLOAD_BYTES is a storage cap: Starlette has already spooled the whole
+    request by the time this runs. What the server receives is bounded by
+    UploadSizeLimit on the request's Content-Length.
+    """
+    os.makedirs(TMP_DIR, exist_ok=True)
+    tmp_path = os.path.join(TMP_DIR, uuid.uuid4().hex)
+    hasher = hashlib.sha256()
+    size = 0
+
+    buffer = await run_in_threadpool(open, tmp_path, "wb")
+    try:
+        while True:
+            chunk = await file.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > MAX_UPLOAD_BYTES:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"{file.filename} exceeds the {MAX_UPLOAD_BYTES // (1024 * 1024)} MB upload limit"
+                )
+            hasher.update(chunk)
+            await run_in_threadpool(buffer.write, chunk)
+    except BaseException:
+        await run_in_threadpool(buffer.close)
+        await run_in_threadpool(os.remove, tmp_path)
+        raise
+    await run_in_threadpool(buffer.close)
+
+    final_path = hashed_path(hasher.hexdigest(), _extension(file.filename))
+    await run_in_threadpool(_finalize, tmp_path, final_path)
+    return final_path
+
+
+class UploadSizeLimit:
+    """
+    ASGI middleware that rejects upload requests before their body is read:
+    411 without a Content-Length, 413 above MAX_UPLOAD_REQUEST_BYTES.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in UPLOAD_ROUTES:
+            length = dict(scope["headers"]).get(b"content-length")
+            response = None
+            if length is None or not length.isdigit():
+                response = JSONResponse({"detail": "Content-Length required"}, status_code=411)
+            elif int(length) > MAX_UPLOAD_REQUEST_BYTES:
+                response = JSONResponse(
+                    {"detail": f"Upload exceeds the {MAX_UPLOAD_REQUEST_BYTES // (1024 * 1024)} MB request limit"},
+                    status_code=413,
+                )
+            if response is not None:
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """StaticFiles that marks content-addressed files as cacheable forever."""
+
+    async def get_response(self, path, scope):
+        response = await super().get_response(path, scope)
+        if response.status_code in (200, 304) and HASHED_PATH_RE.match(path.replace(os.sep, "/")):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
@@ -1,7 +1,8 @@
-import React, { useMemo, useState } from 'react';
+import React, { useEffect, useMemo, useState } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
 import { X } from 'lucide-react';
 import { format } from 'date-fns';
+import MarketContextCard, { prefetchMarketContext } from './MarketContextCard';
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
 
 const JournalFeed = ({ entries, onEdit, onDelete }) => {
@@ -49,6 +50,15 @@ const JournalFeed = ({ entries, onEdit, onDelete }) => {
         return Object.values(groups).sort((a, b) => new Date(b.date) - new Date(a.date));
     }, [entries]);
 
+    // One range request for the market context of every loaded day instead of one per card
+    const newestDate = groupedByDate.length ? groupedByDate[0].date : null;
+    const oldestDate = groupedByDate.length ? groupedByDate[groupedByDate.length - 1].date : null;
+    useEffect(() => {
+        if (oldestDate && newestDate) {
+            prefetchMarketContext(oldestDate, newestDate);
+        }
+    }, [oldestDate, newestDate]);
+
     const handleDelete = (date) => {
         if (window.confirm(`Are you sure you want to delete the log for ${format(new Date(date), 'MMMM do, yyyy')}?`)) {
             onDelete && onDelete(date);
@@ -104,6 +114,11 @@ const JournalFeed = ({ entries, onEdit, onDelete }) => {
                         ))}
                     </div>
 
+                    {/* Market Context */}
+                    <div className="mb-4">
+                        <MarketContextCard date={dayData.date} />
+                    </div>
+
                     {/* Notes */}
                     {dayData.notes && (
                         <div className="text-[#d4d4d8] text-sm mb-4 whitespace-pre-wrap bg-[#18181b] p-3 rounded-lg border border-[#262626]">
@@ -5,6 +5,42 @@ const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
 // Module-level cache - persists across re-renders and component unmounts
 const marketContextCache = {};
 
+// Backend limit per range request (market_context.MAX_RANGE_DAYS)
+const MAX_RANGE_DAYS = 366;
+
+// Range prefetches still in flight - cards for those days wait for them instead of fetching alone
+const pendingPrefetches = [];
+
+const addDays = (isoDate, days) => {
+    const d = new Date(`${isoDate}T00:00:00Z`);
+    d.setUTCDate(d.getUTCDate() + days);
+    return d.toISOString().slice(0, 10);
+};
+
+// Fill the cache for a whole date range (e.g. every day in the feed), one request per MAX_RANGE_DAYS
+export const prefetchMarketContext = (start, end) => {
+    const requests = [];
+    for (let from = start; from <= end; from = addDays(from, MAX_RANGE_DAYS)) {
+        const lastDay = addDays(from, MAX_RANGE_DAYS - 1);
+        const prefetch = { start: from, end: lastDay < end ? lastDay : end };
+        prefetch.promise = (async () => {
+            try {
+                const res = await fetch(`${API_URL}/journal/market_context?start=${prefetch.start}&end=${prefetch.end}`);
+                if (res.ok) {
+                    Object.assign(marketContextCache, await res.json());
+                }
+            } catch (e) {
+                console.error('Failed to prefetch market context:', e);
+            } finally {
+                pendingPrefetches.splice(pendingPrefetches.indexOf(prefetch), 1);
+            }
+        })();
+        pendingPrefetches.push(prefetch);
+        requests.push(prefetch.promise);
+    }
+    return Promise.all(requests);
+};
+
 const MarketContextCard = ({ date }) => {
     const [data, setData] = useState(() => marketContextCache[date] || null);
     const [loading, setLoading] = useState(() => !marketContextCache[date]);
@@ -17,25 +53,36 @@ const MarketContextCard = ({ date }) => {
             return;
         }
 
+        let cancelled = false;
         const fetchData = async () => {
-            try {
-                const res = await fetch(`${API_URL}/journal/market_context/${date}`);
-                if (res.ok) {
-                    const json = await res.json();
-                    // Store in cache
-                    marketContextCache[date] = json;
-                    setData(json);
+            // Parent effects run after their children's: give the feed a tick to start its range prefetch
+            await Promise.resolve();
+            const pending = pendingPrefetches.find(p => p.start <= date && date <= p.end);
+            if (pending) {
+                await pending.promise;
+            }
+
+            if (!marketContextCache[date]) {
+                try {
+                    const res = await fetch(`${API_URL}/journal/market_context/${date}`);
+                    if (res.ok) {
+                        // Store in cache
+                        marketContextCache[date] = await res.json();
+                    }
+                } catch (e) {
+                    console.error('Failed to fetch market context:', e);
+                    // Cache the error state too to avoid re-fetching
+                    marketContextCache[date] = { 'NIFTY 50': { status: 'error' }, 'SENSEX': { status: 'error' } };
                 }
-            } catch (e) {
-                console.error('Failed to fetch market context:', e);
-                // Cache the error state too to avoid re-fetching
-                marketContextCache[date] = { 'NIFTY 50': { status: 'error' }, 'SENSEX': { status: 'error' } };
-                setData(marketContextCache[date]);
-            } finally {
+            }
+
+            if (!cancelled) {
+                setData(marketContextCache[date] || null);
                 setLoading(false);
             }
         };
         fetchData();
+        return () => { cancelled = true; };
     }, [date]);
 
     const renderIndex = (name, indexData) => {